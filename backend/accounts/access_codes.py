@@ -0,0 +1,632 @@
+"""Issuing and redeeming bathroom access codes.
+
+Redemption is a single conditional UPDATE: the newest code matching the
+application and token (or short code) is marked used only if it is still
+unused, unexpired and, when the code is bound to a user, presented for that
+user. No row lock or read-modify-write is needed; concurrent scans of the same
+code race on the UPDATE and exactly one of them wins. On PostgreSQL and SQLite
+3.35+ the UPDATE also RETURNs the claimed row and its place, so a successful
+scan is one statement; only failed redemptions pay for a follow-up read to
+explain why they failed. `aredeem_access_code` is the same flow for the async
+views.
+
+With `ACCESS_CODE_CACHE = True` every issued code is also kept in the cache
+under (application_id, token_hash) and (application_id, code) until
+`ACCESS_CODE_CACHE_RETENTION_DAYS` after it expires (match it to the archive
+window), and a claimed code is kept as a used tombstone for as long. Scans of
+used or expired codes, and of codes bound to another user, are answered from
+those entries. Each application also has a versioned index of the codes it
+still holds, rebuilt from the database on demand and invalidated whenever
+codes are issued or the application changes, so a code missing from the
+index is rejected as invalid without a query. Only codes the index holds but
+whose own entry was evicted go to the database. This requires a cache shared
+by all workers (see `CACHES`), otherwise a worker would not see codes issued
+or used on another one.
+
+With `SIGNED_ACCESS_TOKENS = True` callers may ask for a stateless token
+instead: a signed, compressed payload of (application_id, user_id, expiry,
+nonce) that is verified by recomputing the signature, so issuing writes no
+row. Single use is enforced by adding the nonce to a replay set in the cache
+until the token expires; like the code cache, this needs a shared cache
+(`check_shared_cache` warns when the default cache is per process).
+
+Partners can pre-issue a batch of codes with `issue_code_batch`: tokens are
+hashed from one keyed HMAC state and the rows go in with a single
+`bulk_create`, so a batch of hundreds costs about as much as one issuance.
+"""
+import hashlib
+import hmac
+import random
+import secrets
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks, signing
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+from .models import AccessCode, AccessCodeArchive, CollaboratorApplication
+
+REDEEMED = 'redeemed'
+PLACE_NOT_FOUND = 'place_not_found'
+INVALID = 'invalid'
+USED = 'used'
+EXPIRED = 'expired'
+USER_MISMATCH = 'user_mismatch'
+
+
+CODE_CACHE_KEY = 'access_code:{application_id}:{field}:{value}'
+CODE_INDEX_KEY = 'access_code_index:{application_id}'
+CODE_INDEX_VERSION_KEY = 'access_code_index_version:{application_id}'
+# Matches the default window of `manage.py archive_access_codes`
+DEFAULT_CODE_CACHE_RETENTION_DAYS = 7
+NONCE_CACHE_KEY = 'access_token_nonce:{nonce}'
+SIGNED_TOKEN_SALT = 'accounts.access_token'
+# Upper bound of codes pre-issued in a single batch
+MAX_BATCH_CODES = 500
+# Place columns returned with a successful redemption
+PLACE_COLUMNS = ('id', 'business_name', 'address')
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Signed-token replay protection and the code cache only hold across
+    workers when the default cache is shared by all of them.
+    """
+    backend = type(caches['default']).__name__
+    if not isinstance(caches['default'], (LocMemCache, DummyCache)):
+        return []
+    warnings = []
+    if signed_tokens_enabled():
+        warnings.append(checks.Warning(
+            f'SIGNED_ACCESS_TOKENS is on but the default cache ({backend}) is not shared between '
+            'worker processes, so a signed token can be redeemed once per worker.',
+            hint='Point CACHE_URL at a shared cache such as Redis.',
+            id='accounts.W001',
+        ))
+    if code_cache_enabled():
+        warnings.append(checks.Warning(
+            f'ACCESS_CODE_CACHE is on but the default cache ({backend}) is not shared between '
+            'worker processes, so a worker can reject codes issued or accept codes used on another one.',
+            hint='Point CACHE_URL at a shared cache such as Redis.',
+            id='accounts.W002',
+        ))
+    return warnings
+
+
+def _token_secret() -> str:
+    return getattr(settings, 'ACCESS_TOKEN_SECRET', None) or settings.SECRET_KEY
+
+
+def hash_token(token: str) -> str:
+    # Tokens are stored as an HMAC so plaintext tokens never reach the DB
+    return hmac.new(key=_token_secret().encode('utf-8'), msg=token.encode('utf-8'), digestmod=hashlib.sha256).hexdigest()
+
+
+def hash_tokens(tokens) -> list:
+    """`hash_token` for many tokens, keying the HMAC only once."""
+    keyed = hmac.new(key=_token_secret().encode('utf-8'), digestmod=hashlib.sha256)
+    hashes = []
+    for token in tokens:
+        mac = keyed.copy()
+        mac.update(token.encode('utf-8'))
+        hashes.append(mac.hexdigest())
+    return hashes
+
+
+def signed_tokens_enabled() -> bool:
+    return getattr(settings, 'SIGNED_ACCESS_TOKENS', False)
+
+
+def issue_signed_token(application_id: int, user_id, expires_at) -> str:
+    payload = {
+        'a': application_id,
+        'u': user_id,
+        'e': int(expires_at.timestamp()),
+        'n': secrets.token_urlsafe(9),
+    }
+    return signing.dumps(payload, key=_token_secret(), salt=SIGNED_TOKEN_SALT, compress=True)
+
+
+def is_signed_token(token: str) -> bool:
+    # Random tokens are plain hex; signed ones carry `payload:signature`
+    return ':' in token
+
+
+def load_signed_token(token: str):
+    """Payload of a signed token, or None if the signature does not match."""
+    try:
+        return signing.loads(token, key=_token_secret(), salt=SIGNED_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+
+
+async def signed_token_used(payload: dict) -> bool:
+    return await cache.ahas_key(NONCE_CACHE_KEY.format(nonce=payload['n']))
+
+
+def _signed_token_check(application_id: int, token: str, user_id):
+    """Return (reason, None) for a rejected token, else (None, (nonce_key, ttl))."""
+    payload = load_signed_token(token)
+    if payload is None or payload.get('a') != application_id:
+        return INVALID, None
+    remaining = payload['e'] - timezone.now().timestamp()
+    if remaining <= 0:
+        return EXPIRED, None
+    if user_id is not None and payload.get('u') is not None and str(payload['u']) != str(user_id):
+        return USER_MISMATCH, None
+    return None, (NONCE_CACHE_KEY.format(nonce=payload['n']), int(remaining) + 1)
+
+
+def _signed_redemption(place, now) -> dict:
+    # Signed tokens have no row, so there is no access code id or short code
+    return {'access_code_id': None, 'code': None, 'used_at': now, 'place': place}
+
+
+def redeem_signed_token(application_id: int, token: str, user_id=None) -> tuple:
+    """Verify a stateless token by signature and burn its nonce."""
+    reason, nonce = _signed_token_check(application_id, token, user_id)
+    if reason is not None:
+        return reason, None
+    # Checked before burning the nonce, so a token scanned while its place is
+    # not approved stays usable
+    place = _approved_place(application_id).values(*PLACE_COLUMNS).first()
+    if place is None:
+        return PLACE_NOT_FOUND, None
+    # cache.add is atomic: only the first scan of a nonce succeeds
+    if not cache.add(nonce[0], 1, timeout=nonce[1]):
+        return USED, None
+    return REDEEMED, _signed_redemption(place, timezone.now())
+
+
+async def aredeem_signed_token(application_id: int, token: str, user_id=None) -> tuple:
+    reason, nonce = _signed_token_check(application_id, token, user_id)
+    if reason is not None:
+        return reason, None
+    place = await _approved_place(application_id).values(*PLACE_COLUMNS).afirst()
+    if place is None:
+        return PLACE_NOT_FOUND, None
+    if not await cache.aadd(nonce[0], 1, timeout=nonce[1]):
+        return USED, None
+    return REDEEMED, _signed_redemption(place, timezone.now())
+
+
+def uses_signed_token(token: str) -> bool:
+    """Whether `token` goes through the signed path; with SIGNED_ACCESS_TOKENS
+    off, signed tokens are looked up like any other and match no code.
+    """
+    return bool(token) and is_signed_token(token) and signed_tokens_enabled()
+
+
+def _lookup(token: str, code: str) -> dict:
+    return {'token_hash': hash_token(token)} if token else {'code': code}
+
+
+def code_cache_enabled() -> bool:
+    return getattr(settings, 'ACCESS_CODE_CACHE', False)
+
+
+def code_cache_retention() -> timedelta:
+    """How long cache entries outlive the code's expiry."""
+    return timedelta(days=getattr(settings, 'ACCESS_CODE_CACHE_RETENTION_DAYS', DEFAULT_CODE_CACHE_RETENTION_DAYS))
+
+
+def _entry_ttl(expires_at: float, now) -> float:
+    return expires_at - now.timestamp() + code_cache_retention().total_seconds()
+
+
+def _cache_key(application_id: int, lookup: dict) -> str:
+    (field, value), = lookup.items()
+    return CODE_CACHE_KEY.format(application_id=application_id, field=field, value=value)
+
+
+def _cache_entry_keys(ac: AccessCode) -> list:
+    keys = [_cache_key(ac.application_id, {'code': ac.code})]
+    if ac.token_hash:
+        keys.append(_cache_key(ac.application_id, {'token_hash': ac.token_hash}))
+    return keys
+
+
+def _index_keys(application_id: int) -> tuple:
+    return (
+        CODE_INDEX_KEY.format(application_id=application_id),
+        CODE_INDEX_VERSION_KEY.format(application_id=application_id),
+    )
+
+
+def _index_member(lookup: dict) -> str:
+    (field, value), = lookup.items()
+    # A token hash prefix is enough: a false match only means asking the database
+    return f'{field}:{value[:16]}'
+
+
+def forget_code_index(application_id: int):
+    """Invalidate the application's code index; call once the change committed."""
+    if code_cache_enabled():
+        cache.set(_index_keys(application_id)[1], uuid.uuid4().hex, timeout=None)
+
+
+def _build_code_index(application_id: int, version: str) -> dict:
+    index = {'version': version, 'approved': _approved_place(application_id).exists(), 'members': set()}
+    if index['approved']:
+        # Codes past the retention window count as gone, as after archiving
+        cutoff = timezone.now() - code_cache_retention()
+        rows = (
+            AccessCode.objects.filter(application_id=application_id)
+            .exclude(_archivable(cutoff))
+            .values_list('code', 'token_hash')
+        )
+        for code, token_hash in rows:
+            index['members'].add(_index_member({'code': code}))
+            if token_hash:
+                index['members'].add(_index_member({'token_hash': token_hash}))
+    cache.set(_index_keys(application_id)[0], index, timeout=code_cache_retention().total_seconds())
+    return index
+
+
+def _current_index(application_id: int, found: dict) -> tuple:
+    """(index, version) from a get_many of `_index_keys`; index is None unless current."""
+    index_key, version_key = _index_keys(application_id)
+    index, version = found.get(index_key), found.get(version_key)
+    if index is None or version is None or index['version'] != version:
+        return None, version
+    return index, version
+
+
+def _code_index(application_id: int):
+    """The application's current code index, rebuilt if stale; None if unknown."""
+    index, version = _current_index(application_id, cache.get_many(_index_keys(application_id)))
+    if index is not None:
+        return index
+    if version is None:
+        # The version is read before the rows, so a concurrent issue always invalidates the rebuild
+        version = uuid.uuid4().hex
+        if not cache.add(_index_keys(application_id)[1], version, timeout=None):
+            return None
+    return _build_code_index(application_id, version)
+
+
+async def _acode_index(application_id: int):
+    index, version = _current_index(application_id, await cache.aget_many(_index_keys(application_id)))
+    if index is not None:
+        return index
+    if version is None:
+        version = uuid.uuid4().hex
+        if not await cache.aadd(_index_keys(application_id)[1], version, timeout=None):
+            return None
+    return await sync_to_async(_build_code_index)(application_id, version)
+
+
+def _index_rejection(index, lookup: dict):
+    """Return the failure reason the code index settles, or None."""
+    if index is None:
+        return None
+    if not index['approved']:
+        return PLACE_NOT_FOUND
+    if _index_member(lookup) not in index['members']:
+        return INVALID
+    return None
+
+
+def remember_access_code(ac: AccessCode):
+    """Cache a freshly issued code."""
+    remember_access_codes([ac])
+
+
+def remember_access_codes(codes: list):
+    """Cache freshly issued codes sharing one expiry, in a single round trip."""
+    if not code_cache_enabled() or not codes:
+        return
+    for application_id in {ac.application_id for ac in codes}:
+        transaction.on_commit(lambda application_id=application_id: forget_code_index(application_id))
+    if codes[0].expires_at is None:
+        # Left to the index and the database
+        return
+    now = timezone.now()
+    ttl = _entry_ttl(codes[0].expires_at.timestamp(), now)
+    if ttl <= 0:
+        return
+    entries = {}
+    for ac in codes:
+        entry = {
+            'user_id': ac.user_id,
+            'expires_at': ac.expires_at.timestamp(),
+            'used': False,
+            'keys': _cache_entry_keys(ac),
+        }
+        entries.update({key: entry for key in entry['keys']})
+    cache.set_many(entries, timeout=ttl)
+
+
+def issue_code_batch(application: CollaboratorApplication, count: int, expires_at, created_by=None) -> list:
+    """Create `count` unbound codes for `application` in one INSERT.
+
+    Returns [(access_code, token)]; the plaintext tokens exist only in this
+    return value, so the caller has to hand them out right away.
+    """
+    # Sample without replacement so short codes never collide inside a batch
+    codes = random.sample(range(100000, 1000000), count)
+    tokens = [uuid.uuid4().hex for _ in range(count)]
+    rows = [
+        AccessCode(
+            application=application,
+            code=str(code),
+            token_hash=token_hash,
+            created_by=created_by,
+            expires_at=expires_at,
+        )
+        for code, token_hash in zip(codes, hash_tokens(tokens))
+    ]
+    with transaction.atomic():
+        rows = AccessCode.objects.bulk_create(rows, batch_size=MAX_BATCH_CODES)
+    remember_access_codes(rows)
+    return list(zip(rows, tokens))
+
+
+def _used_entries(entry: dict, now) -> tuple:
+    # Kept past the expiry so replays are still answered from the cache
+    ttl = _entry_ttl(entry['expires_at'], now)
+    return {key: dict(entry, used=True) for key in entry['keys']}, ttl
+
+
+def _mark_cached_used(entry: dict, now):
+    entries, ttl = _used_entries(entry, now)
+    if ttl > 0:
+        cache.set_many(entries, timeout=ttl)
+
+
+def _cached_rejection(entry, user_id, now):
+    """Return the failure reason answerable from the cache entry, or None."""
+    if entry is None:
+        # Not cached: the code index decides
+        return None
+    if entry['used']:
+        return USED
+    if entry['expires_at'] <= now.timestamp():
+        return EXPIRED
+    if user_id is not None and entry['user_id'] is not None and str(entry['user_id']) != str(user_id):
+        return USER_MISMATCH
+    return None
+
+
+def _claim_queryset(application_id: int, lookup: dict, user_id, now):
+    newest = (
+        AccessCode.objects.filter(
+            application_id=application_id,
+            application__status=CollaboratorApplication.Status.APPROVED,
+            **lookup,
+        )
+        .order_by('-created_at')
+        .values('pk')[:1]
+    )
+    claim = AccessCode.objects.filter(pk=Subquery(newest), used=False).filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+    )
+    if user_id is not None:
+        # Codes bound to a user only redeem for that user
+        try:
+            claim = claim.filter(Q(user_id__isnull=True) | Q(user_id=int(user_id)))
+        except (TypeError, ValueError):
+            claim = claim.filter(user_id__isnull=True)
+    return claim
+
+
+CLAIM_RETURNING_SQL = """UPDATE {code_table} SET used = %s, used_at = %s, used_by_id = %s
+WHERE id = (
+    SELECT c.id FROM {code_table} c INNER JOIN {app_table} a ON a.id = c.application_id
+    WHERE c.application_id = %s AND a.status = %s AND c.{field} = %s
+    ORDER BY c.created_at DESC LIMIT 1
+) AND used = %s AND (expires_at IS NULL OR expires_at > %s){user_clause}
+RETURNING id, code,
+    (SELECT business_name FROM {app_table} WHERE {app_table}.id = {code_table}.application_id),
+    (SELECT address FROM {app_table} WHERE {app_table}.id = {code_table}.application_id)"""
+
+
+def _redemption(row: tuple, application_id: int, now) -> dict:
+    access_code_id, code, business_name, address = row
+    return {
+        'access_code_id': access_code_id,
+        'code': code,
+        'used_at': now,
+        'place': {'id': application_id, 'business_name': business_name, 'address': address},
+    }
+
+
+def _claim_returning(application_id: int, lookup: dict, user_id, used_by, now):
+    """`_claim_queryset` as one raw UPDATE ... RETURNING (PostgreSQL, SQLite 3.35+)."""
+    (field, value), = lookup.items()
+    user_clause = ''
+    user_params = []
+    if user_id is not None:
+        try:
+            user_params = [int(user_id)]
+            user_clause = ' AND (user_id IS NULL OR user_id = %s)'
+        except (TypeError, ValueError):
+            user_clause = ' AND user_id IS NULL'
+    sql = CLAIM_RETURNING_SQL.format(
+        code_table=connection.ops.quote_name(AccessCode._meta.db_table),
+        app_table=connection.ops.quote_name(CollaboratorApplication._meta.db_table),
+        field=connection.ops.quote_name(field),
+        user_clause=user_clause,
+    )
+    stamp = connection.ops.adapt_datetimefield_value(now)
+    params = [
+        True, stamp, used_by.pk if used_by is not None else None,
+        application_id, CollaboratorApplication.Status.APPROVED, value,
+        False, stamp, *user_params,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return _redemption(row, application_id, now) if row else None
+
+
+def _claim(application_id: int, lookup: dict, user_id, used_by, now):
+    """Claim the code; returns the redemption (claimed row and place) or None."""
+    # The same feature flag gates INSERT ... RETURNING, so it tracks RETURNING support
+    if connection.features.can_return_columns_from_insert:
+        return _claim_returning(application_id, lookup, user_id, used_by, now)
+    if _claim_queryset(application_id, lookup, user_id, now).update(used=True, used_at=now, used_by=used_by) != 1:
+        return None
+    row = (
+        AccessCode.objects.filter(application_id=application_id, used=True, used_at=now, **lookup)
+        .order_by('-created_at')
+        .values_list('id', 'code', 'application__business_name', 'application__address')
+        .first()
+    )
+    return _redemption(row, application_id, now)
+
+
+def _approved_place(application_id: int):
+    return CollaboratorApplication.objects.filter(pk=application_id, status=CollaboratorApplication.Status.APPROVED)
+
+
+def _newest_code(application_id: int, lookup: dict):
+    return (
+        AccessCode.objects.filter(application_id=application_id, **lookup)
+        .order_by('-created_at')
+        .only('used', 'expires_at')
+    )
+
+
+def _code_rejection(ac, now) -> str:
+    if ac is None:
+        return INVALID
+    if ac.used:
+        return USED
+    if ac.expires_at and ac.expires_at <= now:
+        return EXPIRED
+    return USER_MISMATCH
+
+
+def _failure_reason(application_id: int, lookup: dict, now) -> str:
+    if not _approved_place(application_id).exists():
+        return PLACE_NOT_FOUND
+    return _code_rejection(_newest_code(application_id, lookup).first(), now)
+
+
+# Code index not fetched yet (None means the cache could not provide one)
+_UNKNOWN = object()
+
+
+def _attempts(token: str, code: str) -> list:
+    attempts = []
+    if token:
+        attempts.append(_lookup(token, ''))
+    if code:
+        attempts.append(_lookup('', code))
+    return attempts
+
+
+def redeem_access_code(application_id: int, token: str = '', code: str = '', user_id=None, used_by=None) -> tuple:
+    """Atomically mark the matching code used. Returns (REDEEMED, redemption)
+    or (reason, None) when the code was rejected; the redemption holds the
+    claimed `access_code_id`, `code`, `used_at` and the `place`. The token is
+    preferred; the short code is tried only when no code matches the token.
+    """
+    if uses_signed_token(token):
+        return redeem_signed_token(application_id, token, user_id)
+
+    now = timezone.now()
+    use_cache = code_cache_enabled()
+    index = _UNKNOWN
+    reason = INVALID
+    for lookup in _attempts(token, code):
+        entry = None
+        if use_cache:
+            entry = cache.get(_cache_key(application_id, lookup))
+            reason = _cached_rejection(entry, user_id, now)
+            if reason is None and entry is None:
+                if index is _UNKNOWN:
+                    index = _code_index(application_id)
+                reason = _index_rejection(index, lookup)
+                if reason == INVALID:
+                    continue
+            if reason is not None:
+                break
+        redemption = _claim(application_id, lookup, user_id, used_by, now)
+        if redemption is not None:
+            if entry is not None:
+                _mark_cached_used(entry, now)
+            return REDEEMED, redemption
+        reason = _failure_reason(application_id, lookup, now)
+        if reason != INVALID:
+            break
+    return reason, None
+
+
+async def aredeem_access_code(application_id: int, token: str = '', code: str = '', user_id=None, used_by=None) -> tuple:
+    """`redeem_access_code` on the async ORM and cache APIs."""
+    if uses_signed_token(token):
+        return await aredeem_signed_token(application_id, token, user_id)
+
+    now = timezone.now()
+    use_cache = code_cache_enabled()
+    index = _UNKNOWN
+    reason = INVALID
+    for lookup in _attempts(token, code):
+        entry = None
+        if use_cache:
+            entry = await cache.aget(_cache_key(application_id, lookup))
+            reason = _cached_rejection(entry, user_id, now)
+            if reason is None and entry is None:
+                if index is _UNKNOWN:
+                    index = await _acode_index(application_id)
+                reason = _index_rejection(index, lookup)
+                if reason == INVALID:
+                    continue
+            if reason is not None:
+                break
+        redemption = await sync_to_async(_claim)(application_id, lookup, user_id, used_by, now)
+        if redemption is not None:
+            if entry is not None:
+                entries, ttl = _used_entries(entry, now)
+                if ttl > 0:
+                    await cache.aset_many(entries, timeout=ttl)
+            return REDEEMED, redemption
+        if not await _approved_place(application_id).aexists():
+            reason = PLACE_NOT_FOUND
+        else:
+            reason = _code_rejection(await _newest_code(application_id, lookup).afirst(), now)
+        if reason != INVALID:
+            break
+    return reason, None
+
+
+ARCHIVE_FIELDS = [
+    'id', 'application_id', 'code', 'user_id', 'created_by_id',
+    'created_at', 'expires_at', 'used', 'used_by_id', 'used_at',
+]
+
+
+def _archivable(cutoff) -> Q:
+    return Q(expires_at__lt=cutoff) | Q(used=True, created_at__lt=cutoff)
+
+
+def archivable_codes(older_than: timedelta):
+    """Codes that expired, or were used and issued, before the window."""
+    return AccessCode.objects.filter(_archivable(timezone.now() - older_than))
+
+
+def archive_batch(older_than: timedelta, batch_size: int = 1000) -> int:
+    """Move one bounded batch of old codes to `AccessCodeArchive`.
+    Returns the number of codes moved; 0 means nothing is left to compact.
+    """
+    with transaction.atomic():
+        rows = list(
+            archivable_codes(older_than)
+            .order_by('id')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        # ignore_conflicts makes a re-run after a partial failure harmless
+        AccessCodeArchive.objects.bulk_create([AccessCodeArchive(**row) for row in rows], ignore_conflicts=True)
+        AccessCode.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
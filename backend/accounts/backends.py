@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .users import users_with_email
+
+UserModel = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    """ModelBackend that loads the user's profile in the same query, both at
+    login and when AuthenticationMiddleware restores the user from the session,
+    so `user.profile` costs nothing for the rest of the request.
+
+    `authenticate(request, email=..., password=...)` finds the user by email
+    (case-insensitive, through the lower(email) index) or, failing that, by
+    username, in a single query.
+
+    Failed credentials raise PermissionDenied, which ends `authenticate()`
+    here instead of hashing the password again in ModelBackend (listed after
+    this backend only to restore older sessions). `check_password` rehashes
+    and saves the password when PASSWORD_HASHERS prefers another algorithm
+    or cost.
+    """
+
+    def users(self):
+        return UserModel._default_manager.select_related('profile')
+
+    def user_for_email(self, email):
+        candidates = list(
+            (users_with_email(email, self.users()) | self.users().filter(**{UserModel.USERNAME_FIELD: email}))
+            .order_by('pk')
+        )
+        lookup = email.lower()
+        for user in candidates:
+            if user.email.lower() == lookup:
+                return user
+        for user in candidates:
+            if user.get_username() == email:
+                return user
+        return None
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if (username is None and email is None) or password is None:
+            return None
+        if email is not None:
+            user = self.user_for_email(email)
+        else:
+            user = self.users().filter(**{UserModel.USERNAME_FIELD: username}).first()
+        if user is None:
+            # Run the password hasher anyway, like ModelBackend, to keep timing even
+            UserModel().set_password(password)
+            raise PermissionDenied
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        raise PermissionDenied
+
+    def get_user(self, user_id):
+        try:
+            user = self.users().get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
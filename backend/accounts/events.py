@@ -0,0 +1,321 @@
+"""Publish/subscribe channel for access-code redemption events.
+
+`VerifyAccessCodeView` publishes an event every time a code is redeemed, and
+the server-sent event views in `accounts.views` stream them to whoever holds
+the code (its QR screen) or owns the place (the partner dashboard), so those
+screens do not have to poll.
+
+Two channels receive each event:
+- `access_code:<id>` (or `access_token:<nonce>` for signed tokens), for the
+  screen showing that code.
+- `application:<id>`, for the partner's feed of every redemption at the place.
+
+The broker is chosen by `EVENTS_BACKEND`:
+- 'local' (default): in-process queues. Only subscribers connected to the
+  worker that handled the redemption see the event, so use it with a single
+  ASGI worker or in development.
+- 'redis': Redis pub/sub at `EVENTS_REDIS_URL`, shared by every worker.
+  Needs the `redis` package.
+- 'off': events are dropped; the stream views still report codes that were
+  already redeemed when they connect.
+
+Streaming needs the ASGI entry point (`popi_backend.asgi`); under WSGI a
+stream would hold a worker thread for its whole lifetime.
+"""
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from .access_codes import hash_token, load_signed_token, signed_token_used, uses_signed_token
+from .models import AccessCode
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL_PREFIX = 'popi:events:'
+# Streams are closed after this long; EventSource clients reconnect on their own
+DEFAULT_STREAM_SECONDS = 300
+HEARTBEAT_SECONDS = 15
+
+
+def application_channel(application_id: int) -> str:
+    return f'application:{application_id}'
+
+
+def access_code_channel(access_code_id: int) -> str:
+    return f'access_code:{access_code_id}'
+
+
+def signed_token_channel(nonce: str) -> str:
+    return f'access_token:{nonce}'
+
+
+class LocalSubscription:
+    def __init__(self, broker, channels: list):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout: float):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._remove(self)
+
+    def _deliver(self, event: dict):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            # The subscriber's event loop is gone
+            self.broker._remove(self)
+
+
+class LocalBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel: str, event: dict):
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ()))
+        for subscription in targets:
+            subscription._deliver(event)
+
+    async def subscribe(self, channels: list):
+        subscription = LocalSubscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout: float):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroker:
+    def __init__(self, url: str):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured("EVENTS_BACKEND = 'redis' requires the redis package.") from exc
+        if not url:
+            raise ImproperlyConfigured("EVENTS_BACKEND = 'redis' requires EVENTS_REDIS_URL.")
+        self._url = url
+        self._async_redis = redis.asyncio
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, channel: str, event: dict):
+        self._client.publish(REDIS_CHANNEL_PREFIX + channel, json.dumps(event))
+
+    async def subscribe(self, channels: list):
+        client = self._async_redis.Redis.from_url(self._url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*[REDIS_CHANNEL_PREFIX + channel for channel in channels])
+        return RedisSubscription(client, pubsub)
+
+
+class NullBroker:
+    def publish(self, channel: str, event: dict):
+        pass
+
+    async def subscribe(self, channels: list):
+        return NullSubscription()
+
+
+class NullSubscription:
+    async def get(self, timeout: float):
+        await asyncio.sleep(timeout)
+        return None
+
+    async def close(self):
+        pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Process-wide broker; the local one must be shared by every request."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'EVENTS_BACKEND', 'local')
+                if backend == 'local':
+                    _broker = LocalBroker()
+                elif backend == 'redis':
+                    _broker = RedisBroker(getattr(settings, 'EVENTS_REDIS_URL', ''))
+                elif backend == 'off':
+                    _broker = NullBroker()
+                else:
+                    raise ImproperlyConfigured(f'Unknown EVENTS_BACKEND {backend!r}.')
+    return _broker
+
+
+def signed_token_nonce(application_id: int, token: str):
+    """Nonce of a valid signed token for the application, else None."""
+    payload = load_signed_token(token)
+    if payload is None or payload.get('a') != application_id:
+        return None
+    return payload['n']
+
+
+def redemption_event(application_id: int, access_code_id=None, code=None, redeemed_at=None) -> dict:
+    return {
+        'type': 'redeemed',
+        'application_id': application_id,
+        'access_code_id': access_code_id,
+        'code': code,
+        'redeemed_at': redeemed_at.isoformat() if redeemed_at else None,
+    }
+
+
+def publish_redemption(application_id: int, redemption: dict, token: str = ''):
+    """Announce a redemption that `redeem_access_code` just reported.
+
+    `redemption` is the claimed row it returned, so publishing needs no query
+    and a code redeemed through the short-code fallback is announced on its
+    own channel too. `token` is only used to find a signed token's channel.
+    Failures are logged and never reach the caller.
+    """
+    try:
+        channels = [application_channel(application_id)]
+        event = redemption_event(
+            application_id, redemption['access_code_id'], redemption['code'], redemption['used_at']
+        )
+        if redemption['access_code_id'] is not None:
+            channels.append(access_code_channel(redemption['access_code_id']))
+        elif uses_signed_token(token):
+            nonce = signed_token_nonce(application_id, token)
+            if nonce:
+                channels.append(signed_token_channel(nonce))
+        broker = get_broker()
+        for channel in channels:
+            broker.publish(channel, event)
+    except Exception:
+        logger.exception('Could not publish redemption event for application %s', application_id)
+
+
+def expired_event(application_id: int, expires_at) -> dict:
+    return {'type': 'expired', 'application_id': application_id, 'expires_at': expires_at.isoformat()}
+
+
+async def code_state(application_id: int, token: str):
+    """Where a code holder listens and what already happened to the code.
+
+    Returns {'channel', 'event', 'expires_at'} where `event` is the redemption
+    (or expiry) to report right away, or None if the token matches no code.
+    """
+    now = timezone.now()
+    if uses_signed_token(token):
+        payload = load_signed_token(token)
+        if payload is None or payload.get('a') != application_id:
+            return None
+        expires_at = datetime.fromtimestamp(payload['e'], tz=dt_timezone.utc)
+        event = None
+        if await signed_token_used(payload):
+            event = redemption_event(application_id)
+        elif expires_at <= now:
+            event = expired_event(application_id, expires_at)
+        return {'channel': signed_token_channel(payload['n']), 'event': event, 'expires_at': expires_at}
+
+    row = await (
+        AccessCode.objects.filter(application_id=application_id, token_hash=hash_token(token))
+        .order_by('-created_at')
+        .values('id', 'code', 'used', 'used_at', 'expires_at')
+        .afirst()
+    )
+    if row is None:
+        return None
+    event = None
+    if row['used']:
+        event = redemption_event(application_id, row['id'], row['code'], row['used_at'])
+    elif row['expires_at'] and row['expires_at'] <= now:
+        event = expired_event(application_id, row['expires_at'])
+    return {'channel': access_code_channel(row['id']), 'event': event, 'expires_at': row['expires_at']}
+
+
+def stream_seconds() -> float:
+    return getattr(settings, 'EVENTS_STREAM_SECONDS', DEFAULT_STREAM_SECONDS)
+
+
+def format_sse(event: dict = None, comment: str = None, retry_ms: int = None) -> str:
+    """Serialize one server-sent event frame."""
+    lines = []
+    if retry_ms is not None:
+        lines.append(f'retry: {retry_ms}')
+    if comment is not None:
+        lines.append(f': {comment}')
+    if event is not None:
+        lines.append(f"event: {event['type']}")
+        lines.append('data: ' + json.dumps(event, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(channels: list, duration: float, heartbeat: float = HEARTBEAT_SECONDS,
+                       recheck=None, stop_after_first: bool = False):
+    """Yield SSE frames for events on `channels` for up to `duration` seconds,
+    sending a comment every `heartbeat` seconds so proxies keep the connection.
+
+    `recheck` is an optional coroutine function run once subscribed; an event
+    it returns is sent and ends the stream, which closes the gap between the
+    caller reading the current state and the subscription starting.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    subscription = await get_broker().subscribe(channels)
+    try:
+        yield format_sse(comment='connected', retry_ms=3000)
+        if recheck is not None:
+            event = await recheck()
+            if event is not None:
+                yield format_sse(event)
+                return
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            event = await subscription.get(min(heartbeat, remaining))
+            if event is None:
+                yield format_sse(comment='ping')
+                continue
+            yield format_sse(event)
+            if stop_after_first:
+                return
+    finally:
+        await subscription.close()
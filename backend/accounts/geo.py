@@ -0,0 +1,137 @@
+"""Geo helpers shared by the place endpoints.
+
+Places are indexed with a geohash stored on `CollaboratorApplication.geohash`.
+A radius query is turned into a bounding box plus the set of geohash cells
+covering it, so the database only returns candidates near the center and the
+exact haversine distance is computed on that small set.
+
+Distances for whole candidate sets go through `haversine_km_batch`, which uses
+NumPy when it is installed and falls back to plain Python otherwise.
+"""
+from math import radians, sin, cos, sqrt, atan2, floor
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+# Service area center (Guadalajara) used for coverage validation
+COVERAGE_CENTER = (20.6597, -103.3496)
+# Kilometers per degree of latitude
+KM_PER_DEG_LAT = 111.32
+
+# Precision stored on each row (7 chars ~ 150m x 150m cells)
+GEOHASH_PRECISION = 7
+# Upper bound of cells used to cover a bounding box in a single query
+MAX_COVER_CELLS = 16
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a standard base32 geohash."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value = (value << 1) | 1
+                lng_lo = mid
+            else:
+                value <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int) -> tuple:
+    """Return (lat_degrees, lng_degrees) covered by a geohash cell."""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> tuple:
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing the radius."""
+    dlat = radius_km / KM_PER_DEG_LAT
+    # Longitude degrees shrink with latitude; avoid dividing by ~0 near the poles
+    cos_lat = max(cos(radians(lat)), 0.01)
+    dlng = radius_km / (KM_PER_DEG_LAT * cos_lat)
+    return (
+        max(lat - dlat, -90.0),
+        min(lat + dlat, 90.0),
+        max(lng - dlng, -180.0),
+        min(lng + dlng, 180.0),
+    )
+
+
+def covering_cells(min_lat: float, max_lat: float, min_lng: float, max_lng: float,
+                   max_cells: int = MAX_COVER_CELLS) -> list:
+    """Geohash prefixes covering the box, at the finest precision that keeps
+    the number of cells under `max_cells`.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        lat_from = floor((min_lat + 90.0) / lat_step)
+        lat_to = floor((min(max_lat, 89.999999) + 90.0) / lat_step)
+        lng_from = floor((min_lng + 180.0) / lng_step)
+        lng_to = floor((min(max_lng, 179.999999) + 180.0) / lng_step)
+        count = (lat_to - lat_from + 1) * (lng_to - lng_from + 1)
+        if count > max_cells and precision > 1:
+            continue
+        cells = []
+        for i in range(lat_from, lat_to + 1):
+            center_lat = -90.0 + (i + 0.5) * lat_step
+            for j in range(lng_from, lng_to + 1):
+                center_lng = -180.0 + (j + 0.5) * lng_step
+                cells.append(geohash_encode(center_lat, center_lng, precision))
+        return cells
+    return []
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_km_batch(lat: float, lng: float, lats, lngs) -> list:
+    """Distances in km from one point to every (lats[i], lngs[i]) in one pass."""
+    if np is None:
+        return [haversine_km(lat, lng, float(a), float(b)) for a, b in zip(lats, lngs)]
+    if len(lats) == 0:
+        return []
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lng2 = np.radians(np.asarray(lngs, dtype=np.float64))
+    lat1 = radians(lat)
+    dlat = lat2 - lat1
+    dlng = lng2 - radians(lng)
+    a = np.sin(dlat / 2) ** 2 + cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return (EARTH_RADIUS_KM * c).tolist()
+
+
+def distance_from_coverage_center(lat: float, lng: float) -> float:
+    return haversine_km(COVERAGE_CENTER[0], COVERAGE_CENTER[1], lat, lng)
@@ -0,0 +1,43 @@
+"""Password hashers with their cost taken from settings.
+
+They keep Django's algorithm names, so existing hashes stay valid. Each one's
+`must_update` compares the stored parameters with the configured ones, so
+after PASSWORD_HASHER or a cost setting changes, a user's hash is upgraded
+the next time they log in (`User.check_password` saves the new hash).
+
+Argon2 and bcrypt need the optional `argon2-cffi` / `bcrypt` packages; the
+check below reports a missing one at startup instead of on the first login.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core import checks
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = settings.PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    rounds = settings.BCRYPT_ROUNDS
+
+
+@checks.register(checks.Tags.security)
+def check_password_hasher(app_configs, **kwargs):
+    hasher = hashers.get_hasher('default')
+    if hasher.library is None:
+        return []
+    try:
+        hasher._load_library()
+    except ValueError as exc:
+        return [checks.Error(
+            str(exc),
+            hint=f'Install the library or choose another PASSWORD_HASHER than {hasher.algorithm!r}.',
+            id='accounts.E001',
+        )]
+    return []
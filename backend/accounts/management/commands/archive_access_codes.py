@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from accounts.access_codes import archivable_codes, archive_batch
+
+
+class Command(BaseCommand):
+    help = 'Move expired or used access codes older than the retention window to the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=float, default=7.0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after this many batches (0 = until done).')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches to spread the load.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many codes would be archived.')
+
+    def handle(self, *args, **options):
+        older_than = timedelta(days=options['older_than_days'])
+        if options['dry_run']:
+            self.stdout.write(f'{archivable_codes(older_than).count()} code(s) would be archived')
+            return
+
+        moved = 0
+        batches = 0
+        started = time.monotonic()
+        while True:
+            count = archive_batch(older_than, options['batch_size'])
+            if not count:
+                break
+            moved += count
+            batches += 1
+            self.stdout.write(f'batch {batches}: archived {count}')
+            if options['max_batches'] and batches >= options['max_batches']:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'archived {moved} code(s) in {batches} batch(es) in {time.monotonic() - started:.2f}s'
+        ))
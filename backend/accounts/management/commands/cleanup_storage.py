@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from accounts.storage_cleanup import enqueue_file_deletions, find_orphaned_files, process_batch, queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Delete queued collaborator documents from storage and optionally sweep orphaned files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep draining the queue, sleeping --interval seconds when idle.')
+        parser.add_argument('--interval', type=float, default=10.0)
+        parser.add_argument('--sweep-orphans', action='store_true', help='Queue files under collaborators/ that no application references.')
+        parser.add_argument('--min-age-hours', type=float, default=1.0, help='Only sweep files older than this.')
+        parser.add_argument('--dry-run', action='store_true', help='With --sweep-orphans, list orphans without queueing them.')
+
+    def handle(self, *args, **options):
+        if options['sweep_orphans']:
+            orphans = find_orphaned_files(timedelta(hours=options['min_age_hours']))
+            for name in orphans:
+                self.stdout.write(f'orphan: {name}')
+            if not options['dry_run']:
+                enqueue_file_deletions(orphans)
+            self.stdout.write(f'{len(orphans)} orphaned file(s) {"found" if options["dry_run"] else "queued"}')
+            if options['dry_run']:
+                return
+
+        totals = {'claimed': 0, 'deleted': 0, 'retried': 0, 'failed': 0}
+        started = time.monotonic()
+        while True:
+            stats = process_batch(options['batch_size'])
+            for key, value in stats.items():
+                totals[key] += value
+            if stats['claimed']:
+                self.stdout.write(
+                    'batch: claimed={claimed} deleted={deleted} retried={retried} failed={failed}'.format(**stats)
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        elapsed = time.monotonic() - started
+        backlog = queue_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"done in {elapsed:.2f}s: deleted={totals['deleted']} retried={totals['retried']} failed={totals['failed']}; "
+            f"queue pending={backlog['pending']} due={backlog['due']} failed={backlog['failed']}"
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete expired rows from django_session in bounded batches (unlike clearsessions, which deletes them all at once).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after this many batches (0 = until done).')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches to spread the load.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many sessions would be deleted.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # expire_date is indexed, so each batch is a range scan plus a delete by pk
+        expired = Session.objects.filter(expire_date__lt=now)
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} expired session(s) would be deleted')
+            return
+
+        deleted = 0
+        batches = 0
+        started = time.monotonic()
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            # Re-check the expiry so a session extended meanwhile survives
+            count, _ = Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()
+            deleted += count
+            batches += 1
+            self.stdout.write(f'batch {batches}: deleted {count}')
+            if options['max_batches'] and batches >= options['max_batches']:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'deleted {deleted} session(s) in {batches} batch(es) in {time.monotonic() - started:.2f}s'
+        ))
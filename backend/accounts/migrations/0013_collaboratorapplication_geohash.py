@@ -0,0 +1,37 @@
+"""Add a geohash spatial index column to CollaboratorApplication.
+
+Revision ID: 0013_collaboratorapplication_geohash
+Revises: 0012_remove_token_field
+Create Date: 2026-10-17 10:00
+"""
+from django.db import migrations, models
+
+from accounts.geo import geohash_encode
+
+
+def populate_geohash(apps, schema_editor):
+    CollaboratorApplication = apps.get_model('accounts', 'CollaboratorApplication')
+    for app in CollaboratorApplication.objects.only('id', 'latitude', 'longitude').iterator():
+        CollaboratorApplication.objects.filter(pk=app.pk).update(
+            geohash=geohash_encode(float(app.latitude), float(app.longitude))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_remove_token_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collaboratorapplication',
+            name='geohash',
+            field=models.CharField(max_length=12, blank=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='collaboratorapplication',
+            index=models.Index(fields=['latitude', 'longitude'], name='collab_app_lat_lng_idx'),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+"""Composite indexes backing keyset pagination of the admin listings.
+
+Revision ID: 0014_admin_listing_indexes
+Revises: 0013_collaboratorapplication_geohash
+Create Date: 2026-10-17 12:00
+"""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_collaboratorapplication_geohash'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='collaboratorapplication',
+            index=models.Index(fields=['-created_at', '-id'], name='collab_app_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collaboratorapplication',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='collab_app_status_created_idx'),
+        ),
+        # auth_user belongs to django.contrib.auth, so its index is created with plain SQL
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS auth_user_joined_id_idx ON auth_user (date_joined DESC, id DESC);',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_joined_id_idx;',
+        ),
+    ]
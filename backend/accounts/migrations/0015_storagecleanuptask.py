@@ -0,0 +1,34 @@
+"""Durable queue of storage files pending deletion.
+
+Revision ID: 0015_storagecleanuptask
+Revises: 0014_admin_listing_indexes
+Create Date: 2026-10-17 13:00
+"""
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_admin_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageCleanupTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('failed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['failed_at', 'next_attempt_at'], name='cleanup_task_due_idx')],
+            },
+        ),
+    ]
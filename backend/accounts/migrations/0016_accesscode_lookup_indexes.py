@@ -0,0 +1,25 @@
+"""Composite indexes for access-code redemption lookups.
+
+Revision ID: 0016_accesscode_lookup_indexes
+Revises: 0015_storagecleanuptask
+Create Date: 2026-10-17 14:00
+"""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_storagecleanuptask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accesscode',
+            index=models.Index(fields=['application', 'token_hash', '-created_at'], name='accesscode_app_token_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesscode',
+            index=models.Index(fields=['application', 'code', '-created_at'], name='accesscode_app_code_idx'),
+        ),
+    ]
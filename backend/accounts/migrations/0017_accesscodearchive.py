@@ -0,0 +1,44 @@
+"""Archive table for compacted access codes.
+
+Revision ID: 0017_accesscodearchive
+Revises: 0016_accesscode_lookup_indexes
+Create Date: 2026-10-17 15:00
+"""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_accesscode_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessCodeArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('application_id', models.BigIntegerField(db_index=True)),
+                ('code', models.CharField(max_length=16)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_by_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('used', models.BooleanField(default=False)),
+                ('used_by_id', models.BigIntegerField(blank=True, null=True)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='accesscode',
+            index=models.Index(fields=['expires_at'], name='accesscode_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesscode',
+            index=models.Index(fields=['used', 'created_at'], name='accesscode_used_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+"""Functional index for case-insensitive email lookups at login.
+
+Revision ID: 0019_auth_user_email_lower_idx
+Revises: 0018_ratelimitcounter
+Create Date: 2026-10-17 18:00
+"""
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_ratelimitcounter'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # auth_user belongs to django.contrib.auth, so its index is created with plain SQL
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email));',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_email_lower_idx;',
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from .geo import geohash_encode
 
 
 class UserProfile(models.Model):
@@ -38,6 +41,8 @@ class CollaboratorApplication(models.Model):
     photo_url = models.TextField(blank=True)
     place_types = models.TextField(blank=True)
     place_id = models.CharField(max_length=128, unique=True)
+    # Spatial index cell, derived from latitude/longitude on every save
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
     address_proof_text = models.TextField(blank=True)
     ine_document = models.FileField(upload_to='collaborators/ine/')
     address_proof_document = models.FileField(upload_to='collaborators/address_proof/')
@@ -47,10 +52,24 @@ class CollaboratorApplication(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='collab_app_lat_lng_idx'),
+            # Keyset pagination of the admin review queue
+            models.Index(fields=['-created_at', '-id'], name='collab_app_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='collab_app_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.business_name} ({self.place_id})"
 
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(float(self.latitude), float(self.longitude))
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+                kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
 
 class Bathroom(models.Model):
     """Represents a single bathroom associated with a verified business application.
@@ -87,6 +106,71 @@ class AccessCode(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Redemption looks up the newest code per application by token or short code
+            models.Index(fields=['application', 'token_hash', '-created_at'], name='accesscode_app_token_idx'),
+            models.Index(fields=['application', 'code', '-created_at'], name='accesscode_app_code_idx'),
+            # Compaction scans for expired or used codes
+            models.Index(fields=['expires_at'], name='accesscode_expires_idx'),
+            models.Index(fields=['used', 'created_at'], name='accesscode_used_created_idx'),
+        ]
 
     def __str__(self):
         return f"Code {self.code} for {self.application.business_name} (used={self.used})"
+
+
+class AccessCodeArchive(models.Model):
+    """Expired or used access codes moved out of the live table by
+    `manage.py archive_access_codes`. Plain ids instead of foreign keys keep the
+    history intact after applications or users are deleted.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    application_id = models.BigIntegerField(db_index=True)
+    code = models.CharField(max_length=16)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    created_by_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField(null=True, blank=True)
+    used = models.BooleanField(default=False)
+    used_by_id = models.BigIntegerField(null=True, blank=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Archived code {self.code} (application={self.application_id})"
+
+
+class StorageCleanupTask(models.Model):
+    """A file in default storage waiting to be deleted.
+    Rows are written in the same transaction that drops the reference and are
+    drained by `manage.py cleanup_storage`; a row is removed once the file is
+    gone, or kept with `failed_at` set after too many attempts.
+    """
+    name = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['failed_at', 'next_attempt_at'], name='cleanup_task_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delete {self.name} (attempts={self.attempts})"
+
+
+class RateLimitCounter(models.Model):
+    """Hit counter for one rate-limit key and window (see accounts/ratelimit.py)."""
+    key = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key}={self.count}"
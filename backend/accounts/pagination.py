@@ -0,0 +1,64 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor is the list of sort-key values of the last item in a page, encoded as
+url-safe base64 JSON so clients treat it as an opaque string.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str):
+    """Return the decoded value list, or None if the cursor is malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def keyset_paginate(qs, field: str, cursor=None, limit=None) -> tuple:
+    """Page `qs` newest first on (`field`, id), a datetime column plus the pk
+    as tie-breaker. Returns (items, next_cursor); raises ValueError on a bad
+    cursor or limit.
+    """
+    limit = int(limit) if limit else DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise ValueError('limit')
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    qs = qs.order_by(f'-{field}', '-id')
+    if cursor:
+        values = decode_cursor(cursor)
+        if not values or len(values) != 2:
+            raise ValueError('cursor')
+        last_value = parse_datetime(str(values[0]))
+        if last_value is None:
+            raise ValueError('cursor')
+        try:
+            last_id = int(values[1])
+        except TypeError:
+            # null, a list or an object where the id should be
+            raise ValueError('cursor') from None
+        qs = qs.filter(Q(**{f'{field}__lt': last_value}) | Q(**{field: last_value, 'id__lt': last_id}))
+
+    items = list(qs[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field).isoformat(), last.id])
+    return items, next_cursor
@@ -0,0 +1,385 @@
+"""Read side of the public place endpoints.
+
+The set of active places only changes when an application is approved or a
+bathroom is created/removed, so by default the whole set is served from a
+pre-serialized snapshot kept in the cache. The snapshot is keyed by a version
+number that `accounts.signals` bumps on every `CollaboratorApplication` /
+`Bathroom` save or delete; a new version makes the next request rebuild it.
+
+`DatabasePlaces` and `SnapshotPlaces` expose the same methods so the views do
+not care which one is serving them. Set `PUBLIC_PLACES_SNAPSHOT = False` to
+always query the database (for example when the set is too large to hold in
+memory).
+
+Snapshots and cluster grids are built from the primary database even in views
+that read from a replica (`accounts.replicas`): they are cached until the next
+version, so a lagging replica must not fill them.
+
+`apublic_places` is the entry point for async views: a cached snapshot is read
+with the async cache API and served without leaving the event loop; only
+rebuilding it, or database mode, runs in a worker thread.
+"""
+import time
+from math import floor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .geo import bounding_box, covering_cells, haversine_km_batch
+from .models import CollaboratorApplication
+from .replicas import primary_reads
+
+VERSION_CACHE_KEY = 'public_places:version'
+LAST_MODIFIED_CACHE_KEY = 'public_places:last_modified'
+SNAPSHOT_CACHE_KEY = 'public_places:snapshot:{version}'
+CLUSTERS_CACHE_KEY = 'public_places:clusters:{version}'
+# Bounds how long a worker can serve a snapshot whose invalidation it missed
+# (per-process caches do not see other workers' version bumps).
+DEFAULT_SNAPSHOT_TTL = 300
+
+# Zoom levels up to this one are served as clusters; deeper zooms get places
+CLUSTER_MAX_ZOOM = 14
+# Grid cells per map tile side (a 256px tile split into ~64px cells)
+CLUSTER_CELLS_PER_TILE = 4
+
+
+# Public payload field -> CollaboratorApplication column
+PLACE_COLUMNS = {
+    'id': 'id',
+    'business_name': 'business_name',
+    'address': 'address',
+    'lat': 'latitude',
+    'lng': 'longitude',
+    'rating': 'rating',
+    'review_count': 'review_count',
+    'website': 'website',
+    'business_phone': 'business_phone',
+    'place_id': 'place_id',
+    'photo_url': 'photo_url',
+}
+# Fields a client may request with `?fields=`
+PLACE_FIELDS = list(PLACE_COLUMNS) + ['distance_km']
+
+
+def place_payload(app: CollaboratorApplication, distance_km=None) -> dict:
+    payload = {
+        'id': app.id,
+        'business_name': app.business_name,
+        'address': app.address,
+        'lat': float(app.latitude),
+        'lng': float(app.longitude),
+        'rating': float(app.rating) if app.rating is not None else None,
+        'review_count': app.review_count,
+        'website': app.website,
+        'business_phone': app.business_phone,
+        'place_id': app.place_id,
+        'photo_url': app.photo_url,
+    }
+    if distance_km is not None:
+        payload['distance_km'] = round(distance_km, 3)
+    return payload
+
+
+def place_row_payload(row: dict) -> dict:
+    """`place_payload` for a `.values()` row holding any subset of PLACE_COLUMNS."""
+    payload = {}
+    for field, column in PLACE_COLUMNS.items():
+        if column not in row:
+            continue
+        value = row[column]
+        if column in ('latitude', 'longitude') or (column == 'rating' and value is not None):
+            value = float(value)
+        payload[field] = value
+    return payload
+
+
+def parse_place_fields(raw):
+    """Parse `?fields=a,b`; returns None for every field, raises ValueError
+    naming unknown fields. `id` is always included.
+    """
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in PLACE_FIELDS]
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return list(dict.fromkeys(fields))
+
+
+def shape_places(places: list, fields=None, columnar: bool = False) -> dict:
+    """Response body fragment for a list of place payloads: `{'places': [...]}`,
+    projected on `fields`, or parallel arrays per field when `columnar`.
+    """
+    if fields is None and not columnar:
+        return {'places': places}
+    if fields is None:
+        fields = PLACE_FIELDS
+    if columnar:
+        return {
+            'format': 'columnar',
+            'fields': fields,
+            'count': len(places),
+            'columns': {field: [place.get(field) for place in places] for field in fields},
+        }
+    return {'places': [{field: place.get(field) for field in fields} for place in places]}
+
+
+def public_places_queryset():
+    # Only include applications that have an active bathroom
+    return CollaboratorApplication.objects.filter(
+        status=CollaboratorApplication.Status.APPROVED,
+        bathroom__is_active=True,
+    )
+
+
+def get_places_version() -> int:
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # Seed from the clock so a flushed cache never reuses an old version
+        now = int(time.time())
+        cache.add(LAST_MODIFIED_CACHE_KEY, now, timeout=None)
+        cache.add(VERSION_CACHE_KEY, now, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def get_places_last_modified() -> int:
+    """Unix time of the last change to the public place set."""
+    last_modified = cache.get(LAST_MODIFIED_CACHE_KEY)
+    if last_modified is None:
+        last_modified = int(time.time())
+        cache.add(LAST_MODIFIED_CACHE_KEY, last_modified, timeout=None)
+    return last_modified
+
+
+def bump_places_version() -> int:
+    cache.set(LAST_MODIFIED_CACHE_KEY, int(time.time()), timeout=None)
+    try:
+        return cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        get_places_version()
+        return cache.incr(VERSION_CACHE_KEY)
+
+
+class DatabasePlaces:
+    # Methods query the database; async callers must run them in a thread
+    in_memory = False
+
+    def __init__(self, version: int, fields=None):
+        self.version = version
+        self.last_modified = get_places_last_modified()
+        # Read only the requested columns as plain rows; coordinates are always
+        # needed for the geo filters
+        columns = {PLACE_COLUMNS[field] for field in (fields or PLACE_COLUMNS) if field in PLACE_COLUMNS}
+        self.columns = sorted(columns | {'id', 'latitude', 'longitude'})
+
+    def rows(self):
+        return public_places_queryset().values(*self.columns)
+
+    def recent(self, limit: int) -> list:
+        qs = self.rows().order_by('-created_at')[:limit]
+        return [place_row_payload(row) for row in qs]
+
+    def within_radius(self, center_lat: float, center_lng: float, radius_km: float) -> list:
+        """Return [(distance_km, payload)] for places inside the radius, newest first.
+        The radius is pushed into SQL as a bounding box on lat/lng plus the geohash
+        cells covering it, so only nearby candidates are fetched.
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(center_lat, center_lng, radius_km)
+        cells_q = Q()
+        for cell in covering_cells(min_lat, max_lat, min_lng, max_lng):
+            cells_q |= Q(geohash__startswith=cell)
+        candidates = list(
+            self.rows()
+            .filter(
+                cells_q,
+                latitude__range=(min_lat, max_lat),
+                longitude__range=(min_lng, max_lng),
+            )
+            .order_by('-created_at')
+        )
+        distances = haversine_km_batch(
+            center_lat,
+            center_lng,
+            [row['latitude'] for row in candidates],
+            [row['longitude'] for row in candidates],
+        )
+        return [
+            (distance_km, place_row_payload(row))
+            for distance_km, row in zip(distances, candidates)
+            if distance_km <= radius_km
+        ]
+
+    def within_bbox(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> list:
+        qs = self.rows().filter(
+            latitude__range=(min_lat, max_lat),
+            longitude__range=(min_lng, max_lng),
+        ).order_by('-created_at')
+        return [place_row_payload(row) for row in qs]
+
+    def get(self, pk: int):
+        row = self.rows().filter(pk=pk).first()
+        return place_row_payload(row) if row is not None else None
+
+
+class SnapshotPlaces:
+    in_memory = True
+
+    def __init__(self, snapshot: dict):
+        self.version = snapshot['version']
+        self.places = snapshot['places']
+        self.lats = snapshot['lats']
+        self.lngs = snapshot['lngs']
+        self.last_modified = snapshot['last_modified']
+        self._by_id = None
+
+    @classmethod
+    def build(cls, version: int) -> dict:
+        with primary_reads():
+            places = DatabasePlaces(version).recent(None)
+        return {
+            'version': version,
+            'last_modified': get_places_last_modified(),
+            'places': places,
+            'lats': [place['lat'] for place in places],
+            'lngs': [place['lng'] for place in places],
+        }
+
+    def recent(self, limit: int) -> list:
+        return self.places[:limit]
+
+    def within_radius(self, center_lat: float, center_lng: float, radius_km: float) -> list:
+        distances = haversine_km_batch(center_lat, center_lng, self.lats, self.lngs)
+        return [
+            (distance_km, place)
+            for distance_km, place in zip(distances, self.places)
+            if distance_km <= radius_km
+        ]
+
+    def within_bbox(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> list:
+        return [
+            place
+            for place, lat, lng in zip(self.places, self.lats, self.lngs)
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+        ]
+
+    def get(self, pk: int):
+        if self._by_id is None:
+            self._by_id = {place['id']: place for place in self.places}
+        return self._by_id.get(pk)
+
+
+def public_places(fields=None):
+    """Return the place source for the current request. `fields` limits the
+    columns read in database mode; the snapshot always holds every field.
+    """
+    version = get_places_version()
+    if not getattr(settings, 'PUBLIC_PLACES_SNAPSHOT', True):
+        return DatabasePlaces(version, fields)
+
+    key = SNAPSHOT_CACHE_KEY.format(version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = SnapshotPlaces.build(version)
+        ttl = getattr(settings, 'PUBLIC_PLACES_SNAPSHOT_TTL', DEFAULT_SNAPSHOT_TTL)
+        cache.set(key, snapshot, timeout=ttl)
+    return SnapshotPlaces(snapshot)
+
+
+async def apublic_places(fields=None):
+    """Async `public_places`."""
+    if getattr(settings, 'PUBLIC_PLACES_SNAPSHOT', True):
+        version = await cache.aget(VERSION_CACHE_KEY)
+        if version is not None:
+            snapshot = await cache.aget(SNAPSHOT_CACHE_KEY.format(version=version))
+            if snapshot is not None:
+                return SnapshotPlaces(snapshot)
+    return await sync_to_async(public_places)(fields)
+
+
+def cluster_cell_size(zoom: int) -> float:
+    """Side in degrees of a clustering grid cell at `zoom`."""
+    return 360.0 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+
+
+def build_clusters(places: list) -> dict:
+    """Precompute {zoom: {(ix, iy): cluster}} for every clustered zoom level."""
+    grids = {}
+    for zoom in range(CLUSTER_MAX_ZOOM + 1):
+        size = cluster_cell_size(zoom)
+        grid = {}
+        for place in places:
+            lat, lng = place['lat'], place['lng']
+            key = (floor((lng + 180.0) / size), floor((lat + 90.0) / size))
+            cell = grid.get(key)
+            if cell is None:
+                grid[key] = {
+                    'count': 1,
+                    'sum_lat': lat,
+                    'sum_lng': lng,
+                    'bbox': [lng, lat, lng, lat],
+                    'place': place,
+                }
+                continue
+            cell['count'] += 1
+            cell['sum_lat'] += lat
+            cell['sum_lng'] += lng
+            bbox = cell['bbox']
+            bbox[0] = min(bbox[0], lng)
+            bbox[1] = min(bbox[1], lat)
+            bbox[2] = max(bbox[2], lng)
+            bbox[3] = max(bbox[3], lat)
+        grids[zoom] = grid
+    return grids
+
+
+def get_clusters(places) -> dict:
+    key = CLUSTERS_CACHE_KEY.format(version=places.version)
+    grids = cache.get(key)
+    if grids is None:
+        with primary_reads():
+            grids = build_clusters(places.recent(None))
+        ttl = getattr(settings, 'PUBLIC_PLACES_SNAPSHOT_TTL', DEFAULT_SNAPSHOT_TTL)
+        cache.set(key, grids, timeout=ttl)
+    return grids
+
+
+def clusters_in_bbox(grids: dict, zoom: int, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> tuple:
+    """Return (clusters, places) for the viewport; single-place cells are
+    returned as places so the map can draw them as regular markers.
+    """
+    grid = grids[zoom]
+    size = cluster_cell_size(zoom)
+    ix_from, ix_to = floor((min_lng + 180.0) / size), floor((max_lng + 180.0) / size)
+    iy_from, iy_to = floor((min_lat + 90.0) / size), floor((max_lat + 90.0) / size)
+    if (ix_to - ix_from + 1) * (iy_to - iy_from + 1) <= len(grid):
+        keys = (
+            (ix, iy)
+            for ix in range(ix_from, ix_to + 1)
+            for iy in range(iy_from, iy_to + 1)
+            if (ix, iy) in grid
+        )
+    else:
+        keys = (
+            key for key in grid
+            if ix_from <= key[0] <= ix_to and iy_from <= key[1] <= iy_to
+        )
+
+    clusters = []
+    places = []
+    for key in keys:
+        cell = grid[key]
+        if cell['count'] == 1:
+            places.append(cell['place'])
+            continue
+        clusters.append({
+            'count': cell['count'],
+            'lat': round(cell['sum_lat'] / cell['count'], 6),
+            'lng': round(cell['sum_lng'] / cell['count'], 6),
+            'bbox': cell['bbox'],
+        })
+    return clusters, places
@@ -0,0 +1,234 @@
+"""Rate limiting shared by every worker process.
+
+Limits use a sliding-window counter: hits are counted in fixed windows and the
+previous window is weighted by how much of it still overlaps the sliding
+window, which approximates a true sliding log with two counters per key. Each
+window also records when its last allowed hit happened, and the previous
+window's hits are taken as spread up to that moment rather than over the
+whole window, so a one-hit rule behaves like a plain cooldown. Rejected hits
+are not counted, and Retry-After is the time until the estimate leaves room
+for one more hit, so a client that waits that long gets through.
+
+Counters live in a pluggable backend:
+- 'database': the `RateLimitCounter` table, shared by all workers with no
+  extra infrastructure (SQLite or PostgreSQL). Each hit is a write
+  transaction, so it only suits low-rate rules such as login and issuance.
+- 'cache': the default Django cache. Point `CACHE_URL` at Redis in production;
+  the local-memory cache acts as a single-process stand-in in development
+  (each worker then counts on its own).
+
+`RATE_LIMIT_BACKEND` (default 'database') picks the backend for every rule
+not listed in `RATE_LIMIT_RULE_BACKENDS`, which overrides
+`DEFAULT_RULE_BACKENDS` per name. Code verification is the hot path, so its
+rules default to the cache and a scan never writes a counter row.
+
+Rules are `(limit, window_seconds)` pairs in `RATE_LIMITS`, overriding
+`DEFAULT_RATE_LIMITS` per name.
+"""
+import random
+import time
+from datetime import timedelta
+from math import ceil, floor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RateLimitCounter
+
+DEFAULT_RATE_LIMITS = {
+    # One code per client IP and place per cooldown, as before
+    'issue_guest': (1, 60),
+    'issue_ip': (1, 30),
+    'issue_user': (30, 60),
+    'issue_batch': (10, 3600),
+    'verify_ip': (60, 60),
+    'verify_application': (600, 60),
+    'login_ip': (20, 300),
+    'login_email': (10, 300),
+}
+# Rules kept off the database whatever RATE_LIMIT_BACKEND says
+DEFAULT_RULE_BACKENDS = {
+    'verify_ip': 'cache',
+    'verify_application': 'cache',
+}
+# Fraction of database increments that also purge expired counters
+PURGE_PROBABILITY = 0.01
+
+
+class DatabaseBackend:
+    def incr(self, key: str, ttl: int) -> int:
+        with transaction.atomic():
+            self._upsert(key, F('count') + 1, 1, ttl)
+            count = RateLimitCounter.objects.filter(key=key).values_list('count', flat=True).first() or 0
+        if random.random() < PURGE_PROBABILITY:
+            RateLimitCounter.objects.filter(expires_at__lt=timezone.now()).delete()
+        return count
+
+    def decr(self, key: str):
+        RateLimitCounter.objects.filter(key=key, count__gt=0).update(count=F('count') - 1)
+
+    def set(self, key: str, value: int, ttl: int):
+        with transaction.atomic():
+            self._upsert(key, value, value, ttl)
+
+    def get_many(self, keys: list) -> dict:
+        return dict(RateLimitCounter.objects.filter(key__in=keys).values_list('key', 'count'))
+
+    def _upsert(self, key: str, update, initial: int, ttl: int):
+        if not RateLimitCounter.objects.filter(key=key).update(count=update):
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(
+                        key=key, count=initial, expires_at=timezone.now() + timedelta(seconds=ttl)
+                    )
+            except IntegrityError:
+                # Another worker created it first
+                RateLimitCounter.objects.filter(key=key).update(count=update)
+
+
+class CacheBackend:
+    def incr(self, key: str, ttl: int) -> int:
+        cache.add(key, 0, timeout=ttl)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Expired between add and incr
+            cache.set(key, 1, timeout=ttl)
+            return 1
+
+    def decr(self, key: str):
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+    def set(self, key: str, value: int, ttl: int):
+        cache.set(key, value, timeout=ttl)
+
+    def get_many(self, keys: list) -> dict:
+        return cache.get_many(keys)
+
+
+BACKENDS = {
+    'database': DatabaseBackend,
+    'cache': CacheBackend,
+}
+
+
+def get_backend(name: str = None):
+    """Backend for rule `name`, or the default backend when no name is given."""
+    backend = getattr(settings, 'RATE_LIMIT_RULE_BACKENDS', {}).get(name) or DEFAULT_RULE_BACKENDS.get(name)
+    return BACKENDS[backend or getattr(settings, 'RATE_LIMIT_BACKEND', 'database')]()
+
+
+def get_rule(name: str) -> tuple:
+    return getattr(settings, 'RATE_LIMITS', {}).get(name) or DEFAULT_RATE_LIMITS[name]
+
+
+def _overlap(last, window: float, elapsed: float) -> float:
+    """Share of the previous window's hits still inside the sliding window,
+    which now starts `elapsed` seconds into the previous window. The hits are
+    taken as spread evenly from the window start to the last one, at `last`
+    seconds in (the whole window when unknown).
+    """
+    last = window if last is None else last
+    if last <= elapsed:
+        return 0.0
+    return (last - elapsed) / last
+
+
+def _wait(limit: int, window: float, elapsed: float, previous: int, last_previous, current: int, last_current) -> float:
+    """Seconds until one more hit fits, given the hits counted so far."""
+    room = limit - 1 - current
+    if room >= 0 and previous:
+        # Within this window, once enough of the previous one slid out
+        last = window if last_previous is None else last_previous
+        start = last * (1 - room / previous)
+        if start < window:
+            return start - elapsed
+    # In the next window, where this window's hits are the previous ones
+    room = limit - 1
+    if current <= room:
+        return window - elapsed
+    last = elapsed if last_current is None else last_current
+    return window - elapsed + last * (1 - room / current)
+
+
+def _seconds(milliseconds):
+    return None if milliseconds is None else milliseconds / 1000
+
+
+def _attempt(name: str, ident, backend) -> tuple:
+    """Count one hit for `ident` under rule `name`.
+
+    Returns (0, counted) when allowed, where `counted` is passed to `_keep` or
+    `_release`; otherwise (seconds to wait, None) and nothing stays counted.
+    """
+    limit, window = get_rule(name)
+    now = time.time()
+    index = floor(now / window)
+    elapsed = now - index * window
+    key = f'rl:{name}:{ident}:{{}}'
+    current_key, previous_key = key.format(index), key.format(index - 1)
+    current = backend.incr(current_key, ttl=window * 2)
+    found = backend.get_many([previous_key, f'{previous_key}:last'])
+    previous = found.get(previous_key) or 0
+    last_previous = _seconds(found.get(f'{previous_key}:last'))
+    estimated = previous * _overlap(last_previous, window, elapsed) + current
+    # Tolerance for float rounding, so a retry right at Retry-After is allowed
+    if estimated <= limit + 1e-9:
+        return 0, (backend, current_key, window, elapsed)
+    backend.decr(current_key)
+    last_current = _seconds(backend.get_many([f'{current_key}:last']).get(f'{current_key}:last'))
+    wait = _wait(limit, window, elapsed, previous, last_previous, current - 1, last_current)
+    return max(1, ceil(wait)), None
+
+
+def _keep(counted: tuple):
+    backend, key, window, elapsed = counted
+    backend.set(f'{key}:last', floor(elapsed * 1000), ttl=window * 2)
+
+
+def _release(counted: tuple):
+    backend, key, _, _ = counted
+    backend.decr(key)
+
+
+def hit(name: str, ident, backend=None) -> int:
+    """Count one hit for `ident` under rule `name`.
+    Returns 0 when allowed, otherwise the seconds to wait before retrying.
+    """
+    return check([(name, ident)], backend)
+
+
+def check(rules: list, backend=None) -> int:
+    """Apply several `(name, ident)` rules; returns the longest wait or 0.
+    A request rejected by any rule is counted by none.
+    """
+    attempts = [_attempt(name, ident, backend or get_backend(name)) for name, ident in rules]
+    wait = max([retry_after for retry_after, _ in attempts] or [0])
+    for _, counted in attempts:
+        if counted is not None:
+            (_release if wait else _keep)(counted)
+    return wait
+
+
+def client_ip(request) -> str:
+    """Address to key rate limits on.
+
+    X-Forwarded-For is set by the client unless a proxy rewrites it, so it is
+    only read when `RATE_LIMIT_TRUSTED_PROXIES` says how many proxies of ours
+    append to it; the client is then the hop the outermost of them appended.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR') or 'unknown'
+    trusted = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 0)
+    if trusted <= 0:
+        return remote_addr
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    if len(hops) < trusted:
+        # Reached us without passing through every proxy
+        return remote_addr
+    return hops[-trusted]
@@ -0,0 +1,70 @@
+"""JSON rendering for API responses.
+
+`FastJSONRenderer` is a drop-in for DRF's `JSONRenderer` that encodes with
+orjson when it is installed and falls back to the stdlib encoder otherwise.
+orjson encodes datetimes natively in the same ISO 8601 form DRF uses (UTC as
+`Z`); anything it does not know (Decimal, lazy strings, querysets) goes through
+DRF's own `JSONEncoder.default`, so Decimals still become floats. U+2028 and
+U+2029 are escaped as DRF does, and data orjson cannot encode (integers beyond
+64 bits) is rendered by the stdlib encoder, so the output is byte for byte the
+same as before with two exceptions:
+- floats in exponent form drop the `+` and leading zeros (`1e16`, `1.5e-7`
+  where DRF writes `1e+16`, `1.5e-07`); both parse to the same value.
+- NaN and Infinity become `null`, where DRF's strict renderer raises
+  ValueError. No API payload holds non-finite floats.
+
+`FastJsonResponse` does the same for the plain Django (async) views.
+"""
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _orjson_dumps(data):
+    """orjson output for `data`, or None if orjson cannot encode it."""
+    try:
+        content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        return None
+    # DRF escapes these for JavaScript; in UTF-8 the bytes can only mean them
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def dumps(data) -> bytes:
+    """Compact UTF-8 JSON for `data`, matching DRF's JSONRenderer output."""
+    content = _orjson_dumps(data) if orjson is not None else None
+    return content if content is not None else JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Indented output (`Accept: application/json; indent=4`) keeps the stdlib path
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = _orjson_dumps(data)
+        if content is None:
+            # The stdlib encoder renders it, or raises as DRF would
+            return super().render(data, accepted_media_type, renderer_context)
+        return content
+
+
+class FastJsonResponse(HttpResponse):
+    """`JsonResponse` encoded with `dumps`."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
@@ -0,0 +1,160 @@
+"""Read-replica routing.
+
+`DATABASE_REPLICAS` lists the aliases in `DATABASES` that replicate 'default'
+(configured from `DB_REPLICA_URLS`). Writes always go to 'default'. Reads go
+to a random replica only inside views decorated with `reads_from_replica`
+(the public place endpoints and the admin overview); everything else, and
+any read inside a transaction on 'default', stays on the primary.
+
+Read-your-writes: once a request writes anything (a save, an update, a
+session or rate-limit counter), its remaining reads use the primary and
+`ReplicaPinMiddleware` sets a cookie that keeps the client on the primary for
+`REPLICA_PIN_SECONDS`, which should exceed the replication lag. So a partner
+who just applied (`CollaboratorApplyView`) or an admin who just approved an
+application reads their own change on the next request.
+
+Data that is cached until the next write (the places snapshot and cluster
+grids, the admin totals) is built inside `primary_reads`, so a lagging replica
+never ends up cached under a new version.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE_NAME = 'db_primary'
+DEFAULT_PIN_SECONDS = 5
+
+_state = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    """Per-request routing flags, shared with the threads the request's
+    queries run in (the object is mutated, never replaced).
+    """
+    __slots__ = ('pinned', 'replica', 'wrote')
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.replica = False
+        self.wrote = False
+
+
+def replica_aliases() -> list:
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def _reads_on_replica(enabled: bool):
+    state = _state.get()
+    token = None
+    if state is None:
+        # Outside a request (management commands, shell)
+        state = RoutingState()
+        token = _state.set(state)
+    previous = state.replica
+    state.replica = enabled
+    try:
+        yield
+    finally:
+        state.replica = previous
+        if token is not None:
+            _state.reset(token)
+
+
+def replica_reads():
+    """Context manager sending the enclosed reads to a replica."""
+    return _reads_on_replica(True)
+
+
+def primary_reads():
+    """Context manager keeping the enclosed reads on the primary."""
+    return _reads_on_replica(False)
+
+
+def reads_from_replica(func):
+    """Decorator for view handlers (sync or async) whose reads may use a replica."""
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with replica_reads():
+                return await func(*args, **kwargs)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with replica_reads():
+                return func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.pinned or state.wrote:
+            return None
+        aliases = replica_aliases()
+        if not aliases or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        # Explicit, so objects read from a replica are still saved on the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+def _pin(response, state):
+    if state.wrote and replica_aliases():
+        response.set_cookie(
+            PIN_COOKIE_NAME, '1',
+            max_age=getattr(settings, 'REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS),
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite='Lax',
+        )
+    return response
+
+
+class ReplicaPinMiddleware:
+    """Track writes per request and pin the client to the primary after one.
+
+    Listed before SessionMiddleware so session saves count as writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=PIN_COOKIE_NAME in request.COOKIES)
+        token = _state.set(state)
+        try:
+            return _pin(self.get_response(request), state)
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=PIN_COOKIE_NAME in request.COOKIES)
+        token = _state.set(state)
+        try:
+            return _pin(await self.get_response(request), state)
+        finally:
+            _state.reset(token)
@@ -2,7 +2,9 @@
 from django.db import transaction
 from rest_framework import serializers
 
+from .geo import distance_from_coverage_center
 from .models import UserProfile, CollaboratorApplication, Bathroom
+from .users import users_with_email
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -14,7 +16,7 @@ class RegisterSerializer(serializers.Serializer):
     password_confirmation = serializers.CharField(write_only=True, min_length=8)
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if users_with_email(value).exists():
             raise serializers.ValidationError('Este correo ya esta registrado.')
         return value
 
@@ -82,7 +84,7 @@ class CollaboratorApplicationSerializer(serializers.Serializer):
         return value
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if users_with_email(value).exists():
             raise serializers.ValidationError('Este correo ya esta registrado.')
         return value
 
@@ -95,20 +97,8 @@ class CollaboratorApplicationSerializer(serializers.Serializer):
         if address_text != proof_text:
             raise serializers.ValidationError({'proof_address': 'La direccion del comprobante debe coincidir con la seleccionada.'})
 
-        # Coverage validation: simple example, ensure within ~30km radius of Guadalajara center (lat 20.6597, lon -103.3496)
-        center_lat = 20.6597
-        center_lon = -103.3496
-        lat = float(attrs['latitude'])
-        lon = float(attrs['longitude'])
-
-        from math import radians, sin, cos, sqrt, atan2
-
-        r = 6371
-        dlat = radians(lat - center_lat)
-        dlon = radians(lon - center_lon)
-        a = sin(dlat / 2) ** 2 + cos(radians(center_lat)) * cos(radians(lat)) * sin(dlon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        distance = r * c
+        # Coverage validation: simple example, ensure within ~30km radius of Guadalajara center
+        distance = distance_from_coverage_center(float(attrs['latitude']), float(attrs['longitude']))
         if distance > 30:
             raise serializers.ValidationError({'latitude': 'Fuera del area de cobertura (30km de Guadalajara).'})
         return attrs
@@ -209,17 +199,7 @@ class CollaboratorBusinessSerializer(serializers.Serializer):
             })
 
         # Coverage validation ~50km from Guadalajara center (expanded for flexibility)
-        center_lat = 20.6597
-        center_lon = -103.3496
-        lat = float(attrs['latitude'])
-        lon = float(attrs['longitude'])
-        from math import radians, sin, cos, sqrt, atan2
-        r = 6371
-        dlat = radians(lat - center_lat)
-        dlon = radians(lon - center_lon)
-        a = sin(dlat / 2) ** 2 + cos(radians(center_lat)) * cos(radians(lat)) * sin(dlon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        distance = r * c
+        distance = distance_from_coverage_center(float(attrs['latitude']), float(attrs['longitude']))
         if distance > 50:
             raise serializers.ValidationError({
                 'address': f'El negocio esta a {distance:.1f}km de Guadalajara. Actualmente solo cubrimos hasta 50km.'
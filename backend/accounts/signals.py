@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .access_codes import forget_code_index
+from .models import Bathroom, CollaboratorApplication, UserProfile
+from .places import bump_places_version
+from .stats import invalidate_admin_totals
+from .users import invalidate_user_payloads
+
+
+@receiver(post_save, sender=CollaboratorApplication)
+@receiver(post_delete, sender=CollaboratorApplication)
+@receiver(post_save, sender=Bathroom)
+@receiver(post_delete, sender=Bathroom)
+def invalidate_public_places(sender, **kwargs):
+    # Any change to an application or bathroom may add/remove/alter a public place.
+    # After commit, so a concurrent rebuild cannot cache pre-commit rows under the new version.
+    transaction.on_commit(bump_places_version)
+
+
+@receiver(post_save, sender=CollaboratorApplication)
+@receiver(post_delete, sender=CollaboratorApplication)
+def invalidate_access_code_index(sender, instance, **kwargs):
+    # The index records whether the place is approved
+    application_id = instance.pk
+    transaction.on_commit(lambda: forget_code_index(application_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=CollaboratorApplication)
+@receiver(post_delete, sender=CollaboratorApplication)
+def invalidate_admin_overview(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no total depends on
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    transaction.on_commit(invalidate_admin_totals)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_user_payload(sender, instance, update_fields=None, **kwargs):
+    # last_login is not part of the payload
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    # After commit, so a concurrent read cannot cache the old rows again
+    transaction.on_commit(lambda: invalidate_user_payloads([user_id]))
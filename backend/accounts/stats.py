@@ -0,0 +1,62 @@
+"""Dashboard totals for the admin overview.
+
+Totals come from one conditional-aggregation query per table and are cached
+for a short TTL. `accounts.signals` drops the cached value whenever a user,
+profile or application changes, so the TTL only bounds the drift of the
+rolling "last 7 days" counters. They are computed on the primary database so
+a lagging replica is never cached (see `accounts.replicas`).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import CollaboratorApplication
+from .replicas import primary_reads
+
+TOTALS_CACHE_KEY = 'admin_overview:totals'
+DEFAULT_TOTALS_TTL = 60
+
+
+def compute_admin_totals() -> dict:
+    last_week = timezone.now() - timedelta(days=7)
+    users = User.objects.aggregate(
+        users=Count('id'),
+        customers=Count('id', filter=Q(profile__role='customer')),
+        staff=Count('id', filter=Q(is_staff=True)),
+        new_users_week=Count('id', filter=Q(date_joined__gte=last_week)),
+    )
+    Status = CollaboratorApplication.Status
+    applications = CollaboratorApplication.objects.aggregate(
+        collaborators=Count('id', filter=Q(status=Status.APPROVED)),
+        new_collaborators_week=Count('id', filter=Q(created_at__gte=last_week)),
+        pending_collaborators=Count('id', filter=Q(status=Status.PENDING)),
+        rejected_collaborators=Count('id', filter=Q(status=Status.REJECTED)),
+    )
+    return {
+        'users': users['users'],
+        'customers': users['customers'],
+        'collaborators': applications['collaborators'],
+        'staff': users['staff'],
+        'new_users_week': users['new_users_week'],
+        'new_collaborators_week': applications['new_collaborators_week'],
+        'pending_collaborators': applications['pending_collaborators'],
+        'rejected_collaborators': applications['rejected_collaborators'],
+    }
+
+
+def admin_totals() -> dict:
+    totals = cache.get(TOTALS_CACHE_KEY)
+    if totals is None:
+        with primary_reads():
+            totals = compute_admin_totals()
+        ttl = getattr(settings, 'ADMIN_TOTALS_TTL', DEFAULT_TOTALS_TTL)
+        cache.set(TOTALS_CACHE_KEY, totals, timeout=ttl)
+    return totals
+
+
+def invalidate_admin_totals():
+    cache.delete(TOTALS_CACHE_KEY)
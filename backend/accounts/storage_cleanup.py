@@ -0,0 +1,112 @@
+"""Durable removal of collaborator documents from storage.
+
+Request handlers never touch storage: `enqueue_file_deletions` writes a
+`StorageCleanupTask` row in the same transaction that drops the reference, and
+`manage.py cleanup_storage` drains the queue in batches, retrying failures with
+exponential backoff. `find_orphaned_files` lists documents under
+`collaborators/` that no application references any more (for example files
+left behind before this queue existed) so the sweeper can queue them too.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CollaboratorApplication, StorageCleanupTask
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_DIRS = ['collaborators/ine', 'collaborators/address_proof']
+MAX_ATTEMPTS = 8
+BASE_RETRY_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def enqueue_file_deletions(names: list):
+    names = [name for name in names if name]
+    if names:
+        StorageCleanupTask.objects.bulk_create([StorageCleanupTask(name=name) for name in names])
+
+
+def application_document_names(app) -> list:
+    return [app.ine_document.name, app.address_proof_document.name]
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return min(BASE_RETRY_DELAY * (2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+def process_batch(batch_size: int = 100) -> dict:
+    """Delete up to `batch_size` due files. Returns counters for the run."""
+    stats = {'claimed': 0, 'deleted': 0, 'retried': 0, 'failed': 0}
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked lets several workers drain the queue without blocking each other
+        tasks = list(
+            StorageCleanupTask.objects.select_for_update(skip_locked=True)
+            .filter(failed_at__isnull=True, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        stats['claimed'] = len(tasks)
+        done = []
+        for task in tasks:
+            try:
+                default_storage.delete(task.name)
+            except Exception as exc:
+                task.attempts += 1
+                task.last_error = f'{type(exc).__name__}: {exc}'
+                if task.attempts >= MAX_ATTEMPTS:
+                    task.failed_at = now
+                    stats['failed'] += 1
+                    logger.error('Giving up deleting %s after %d attempts: %s', task.name, task.attempts, task.last_error)
+                else:
+                    task.next_attempt_at = now + retry_delay(task.attempts)
+                    stats['retried'] += 1
+                task.save(update_fields=['attempts', 'last_error', 'failed_at', 'next_attempt_at'])
+            else:
+                done.append(task.id)
+        StorageCleanupTask.objects.filter(id__in=done).delete()
+        stats['deleted'] = len(done)
+    return stats
+
+
+def queue_stats() -> dict:
+    now = timezone.now()
+    pending = StorageCleanupTask.objects.filter(failed_at__isnull=True)
+    return {
+        'pending': pending.count(),
+        'due': pending.filter(next_attempt_at__lte=now).count(),
+        'failed': StorageCleanupTask.objects.filter(failed_at__isnull=False).count(),
+    }
+
+
+def find_orphaned_files(min_age: timedelta = timedelta(hours=1)) -> list:
+    """Document files no application references. Files newer than `min_age`
+    are skipped so uploads whose row is not committed yet are left alone.
+    """
+    referenced = set()
+    for ine, proof in CollaboratorApplication.objects.values_list('ine_document', 'address_proof_document').iterator():
+        referenced.update((ine, proof))
+    referenced.update(
+        StorageCleanupTask.objects.filter(failed_at__isnull=True).values_list('name', flat=True)
+    )
+
+    cutoff = timezone.now() - min_age
+    orphans = []
+    for directory in DOCUMENT_DIRS:
+        if not default_storage.exists(directory):
+            continue
+        _, files = default_storage.listdir(directory)
+        for filename in files:
+            name = f'{directory}/{filename}'
+            if name in referenced:
+                continue
+            try:
+                if default_storage.get_modified_time(name) > cutoff:
+                    continue
+            except (NotImplementedError, OSError):
+                pass
+            orphans.append(name)
+    return orphans
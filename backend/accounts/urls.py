@@ -1,4 +1,5 @@
-﻿from django.urls import path
+﻿from django.conf import settings
+from django.urls import path
 
 from .views import (
     RegisterView,
@@ -7,34 +8,64 @@ from .views import (
     MeView,
     CollaboratorRegisterView,
     AdminOverviewView,
+    AdminCollaboratorListView,
+    AdminUserListView,
     CollaboratorDecisionView,
+    CollaboratorBulkDecisionView,
     CsrfTokenView,
     PublicPlacesView,
+    PublicPlaceClustersView,
     PublicPlaceDetailView,
     IssueAccessCodeView,
     VerifyAccessCodeView,
     CollaboratorApplyView,
     PartnerApplicationsView,
     PartnerCreateBathroomView,
+    PartnerAccessCodeBatchView,
+    AccessCodeEventsView,
+    PartnerCodeEventsView,
     DebugSessionView,
+    AsyncPublicPlacesView,
+    AsyncPublicPlaceDetailView,
+    AsyncMeView,
+    AsyncVerifyAccessCodeView,
 )
 
+# Async-native variants of the hot endpoints, for deployments served through ASGI
+if settings.ASYNC_VIEWS:
+    me_view = AsyncMeView.as_view()
+    public_places_view = AsyncPublicPlacesView.as_view()
+    public_place_detail_view = AsyncPublicPlaceDetailView.as_view()
+    verify_access_code_view = AsyncVerifyAccessCodeView.as_view()
+else:
+    me_view = MeView.as_view()
+    public_places_view = PublicPlacesView.as_view()
+    public_place_detail_view = PublicPlaceDetailView.as_view()
+    verify_access_code_view = VerifyAccessCodeView.as_view()
+
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
-    path('me/', MeView.as_view(), name='me'),
+    path('me/', me_view, name='me'),
     path('debug/session/', DebugSessionView.as_view(), name='debug-session'),
     path('collaborator/register/', CollaboratorRegisterView.as_view(), name='collaborator-register'),
     path('admin/overview/', AdminOverviewView.as_view(), name='admin-overview'),
+    path('admin/collaborators/', AdminCollaboratorListView.as_view(), name='admin-collaborator-list'),
+    path('admin/users/', AdminUserListView.as_view(), name='admin-user-list'),
+    path('admin/collaborators/decision/', CollaboratorBulkDecisionView.as_view(), name='admin-collaborator-bulk-decision'),
     path('admin/collaborators/<int:pk>/decision/', CollaboratorDecisionView.as_view(), name='admin-collaborator-decision'),
     path('csrf/', CsrfTokenView.as_view(), name='csrf-token'),
-    path('places/public/', PublicPlacesView.as_view(), name='public-places'),
-    path('places/public/<int:pk>/', PublicPlaceDetailView.as_view(), name='public-place-detail'),
+    path('places/public/', public_places_view, name='public-places'),
+    path('places/public/clusters/', PublicPlaceClustersView.as_view(), name='public-place-clusters'),
+    path('places/public/<int:pk>/', public_place_detail_view, name='public-place-detail'),
     path('collaborator/apply/', CollaboratorApplyView.as_view(), name='collaborator-apply'),
     path('codes/issue/', IssueAccessCodeView.as_view(), name='issue-access-code'),
-    path('codes/verify/', VerifyAccessCodeView.as_view(), name='verify-access-code'),
+    path('codes/verify/', verify_access_code_view, name='verify-access-code'),
+    path('codes/events/', AccessCodeEventsView.as_view(), name='access-code-events'),
     path('partner/applications/', PartnerApplicationsView.as_view(), name='partner-applications'),
     path('partner/applications/<int:application_id>/bathroom/', PartnerCreateBathroomView.as_view(), name='partner-create-bathroom'),
+    path('partner/applications/<int:application_id>/codes/batch/', PartnerAccessCodeBatchView.as_view(), name='partner-access-code-batch'),
+    path('partner/applications/<int:application_id>/codes/events/', PartnerCodeEventsView.as_view(), name='partner-code-events'),
 ]
 
@@ -0,0 +1,97 @@
+"""The `user` payload returned by login, register and `me/`.
+
+The frontend calls `me/` on almost every route change, so the payload is
+cached per user. Each user has a version key; `accounts.signals` replaces it
+whenever the `User` or `UserProfile` changes (after the transaction commits),
+which makes the next read rebuild the payload. A payload computed from stale
+rows just before an invalidation is stored under the old version and never
+read again.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.functions import Lower
+
+VERSION_CACHE_KEY = 'user_payload:version:{user_id}'
+PAYLOAD_CACHE_KEY = 'user_payload:{user_id}:{version}'
+DEFAULT_USER_PAYLOAD_TTL = 300
+
+
+def users_with_email(email: str, queryset=None):
+    """Users whose email matches `email` case-insensitively.
+
+    Filters on `LOWER(email)` so the lookup uses the auth_user_email_lower_idx
+    index (migration 0019); `email__iexact` compiles to `UPPER(...)` on
+    PostgreSQL and scans the table.
+    """
+    queryset = User.objects.all() if queryset is None else queryset
+    return queryset.alias(email_lower=Lower('email')).filter(email_lower=email.lower())
+
+
+def user_payload(user: User) -> dict:
+    profile = getattr(user, 'profile', None)
+    role_base = getattr(profile, 'role', None) or 'customer'
+    role_effective = 'admin' if (user.is_staff or user.is_superuser) else role_base
+    return {
+        'id': user.id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'phone_number': getattr(profile, 'phone_number', None),
+        'role': role_base,
+        'role_effective': role_effective,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+    }
+
+
+def payload_ttl() -> int:
+    return getattr(settings, 'USER_PAYLOAD_TTL', DEFAULT_USER_PAYLOAD_TTL)
+
+
+def _new_version() -> int:
+    return time.time_ns()
+
+
+def _version(user_id: int) -> int:
+    key = VERSION_CACHE_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=payload_ttl())
+        version = cache.get(key)
+    return version
+
+
+def cached_user_payload(user: User) -> dict:
+    key = PAYLOAD_CACHE_KEY.format(user_id=user.id, version=_version(user.id))
+    payload = cache.get(key)
+    if payload is None:
+        payload = user_payload(user)
+        cache.set(key, payload, timeout=payload_ttl())
+    return payload
+
+
+async def acached_user_payload(user: User) -> dict:
+    """Async `cached_user_payload`."""
+    version_key = VERSION_CACHE_KEY.format(user_id=user.id)
+    version = await cache.aget(version_key)
+    if version is None:
+        await cache.aadd(version_key, _new_version(), timeout=payload_ttl())
+        version = await cache.aget(version_key)
+    key = PAYLOAD_CACHE_KEY.format(user_id=user.id, version=version)
+    payload = await cache.aget(key)
+    if payload is None:
+        # Users restored by ProfileModelBackend carry their profile; others
+        # (sessions from before it) load it lazily, which must not run on the loop
+        payload = await sync_to_async(user_payload)(user)
+        await cache.aset(key, payload, timeout=payload_ttl())
+    return payload
+
+
+def invalidate_user_payloads(user_ids):
+    ttl = payload_ttl()
+    version = _new_version()
+    cache.set_many({VERSION_CACHE_KEY.format(user_id=user_id): version for user_id in user_ids}, timeout=ttl)
@@ -1,22 +1,85 @@
-from datetime import timedelta
+import csv
+import hashlib
+import json
+import math
+from datetime import datetime, timedelta
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.middleware.csrf import get_token
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.conf import settings
 from django.db import transaction
-from django.core.cache import cache
+from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
 
 from .models import CollaboratorApplication, UserProfile, Bathroom
 from .models import AccessCode
+from .access_codes import (
+    EXPIRED,
+    INVALID,
+    MAX_BATCH_CODES,
+    PLACE_NOT_FOUND,
+    REDEEMED,
+    USED,
+    USER_MISMATCH,
+    aredeem_access_code,
+    hash_token,
+    issue_code_batch,
+    issue_signed_token,
+    redeem_access_code,
+    remember_access_code,
+    signed_tokens_enabled,
+)
+from .events import (
+    application_channel,
+    code_state,
+    event_stream,
+    format_sse,
+    publish_redemption,
+    stream_seconds,
+)
+from .pagination import encode_cursor, decode_cursor, keyset_paginate
+from .places import (
+    CLUSTER_MAX_ZOOM,
+    apublic_places,
+    bump_places_version,
+    clusters_in_bbox,
+    get_clusters,
+    parse_place_fields,
+    place_payload,
+    public_places,
+    shape_places,
+)
+from .ratelimit import check as check_rate_limits, client_ip
+from .renderers import FastJsonResponse
+from .replicas import reads_from_replica
+from .stats import admin_totals, invalidate_admin_totals
+from .storage_cleanup import application_document_names, enqueue_file_deletions
+from .users import acached_user_payload, cached_user_payload, invalidate_user_payloads, user_payload
 from .serializers import RegisterSerializer, LoginSerializer, CollaboratorApplicationSerializer, CollaboratorBusinessSerializer, BathroomSerializer
 
 
+def rate_limited_response(retry_after: int, response_class=Response):
+    response = response_class(
+        {'detail': 'Demasiadas solicitudes. Intenta nuevamente en unos segundos.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -53,13 +116,11 @@ class LoginView(APIView):
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data['email']
         password = serializer.validated_data['password']
-        # Accept either email or username
-        user = None
-        try:
-            candidate = User.objects.get(email__iexact=email)
-            user = authenticate(username=candidate.username, password=password)
-        except User.DoesNotExist:
-            user = authenticate(username=email, password=password)
+        retry_after = check_rate_limits([('login_ip', client_ip(request)), ('login_email', email.lower())])
+        if retry_after:
+            return rate_limited_response(retry_after)
+        # Accepts either email or username; see ProfileModelBackend
+        user = authenticate(request, email=email, password=password)
         if not user:
             return Response({'detail': 'Credenciales invalidas.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -84,7 +145,7 @@ class MeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        return Response({'user': user_payload(request.user)})
+        return Response({'user': cached_user_payload(request.user)})
 
 
 class DebugSessionView(APIView):
@@ -120,9 +181,46 @@ class CsrfTokenView(APIView):
         return resp
 
 
+def admin_user_payload(user: User) -> dict:
+    return {
+        'id': user.id,
+        'name': f'{user.first_name} {user.last_name}'.strip(),
+        'email': user.email,
+        'role': getattr(user.profile, 'role', 'admin') if hasattr(user, 'profile') else ('admin' if user.is_staff else 'customer'),
+        'is_staff': user.is_staff,
+        'date_joined': user.date_joined,
+    }
+
+
+def admin_application_payload(app: CollaboratorApplication) -> dict:
+    user = app.user
+    return {
+        'application_id': app.id,
+        'user_id': user.id,
+        'name': f'{user.first_name} {user.last_name}'.strip(),
+        'email': user.email,
+        'phone_number': getattr(user.profile, 'phone_number', None) if hasattr(user, 'profile') else None,
+        'business_name': app.business_name,
+        'address': app.address,
+        'lat': float(app.latitude),
+        'lng': float(app.longitude),
+        'created_at': app.created_at,
+        'place_id': app.place_id,
+        'website': app.website,
+        'schedule': app.schedule,
+        'rating': float(app.rating) if app.rating is not None else None,
+        'review_count': app.review_count,
+        'status': app.status,
+        'address_proof_text': app.address_proof_text,
+        'ine_document_url': app.ine_document.url if app.ine_document else None,
+        'address_proof_document_url': app.address_proof_document.url if app.address_proof_document else None,
+    }
+
+
 class AdminOverviewView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
+    @reads_from_replica
     def get(self, request):
         users = (
             User.objects.select_related('profile')
@@ -132,82 +230,127 @@ class AdminOverviewView(APIView):
         applications = (
             CollaboratorApplication.objects.select_related('user', 'user__profile')
             .all()
-            .order_by('-created_at')
-        )
-
-        total_users = users.count()
-        total_collaborators = applications.filter(status=CollaboratorApplication.Status.APPROVED).count()
-        total_customers = (
-            UserProfile.objects.filter(role='customer').count()
+            .order_by('-created_at', '-id')
         )
-        total_staff = users.filter(is_staff=True).count()
-        total_pending = applications.filter(status=CollaboratorApplication.Status.PENDING).count()
-        total_rejected = applications.filter(status=CollaboratorApplication.Status.REJECTED).count()
-
-        last_week = timezone.now() - timedelta(days=7)
-        new_users_week = users.filter(date_joined__gte=last_week).count()
-        new_applications_week = applications.filter(created_at__gte=last_week).count()
-
-        users_payload = [
-            {
-                'id': user.id,
-                'name': f'{user.first_name} {user.last_name}'.strip(),
-                'email': user.email,
-                'role': getattr(user.profile, 'role', 'admin') if hasattr(user, 'profile') else ('admin' if user.is_staff else 'customer'),
-                'is_staff': user.is_staff,
-                'date_joined': user.date_joined,
-            }
-            for user in users[:25]
-        ]
-
-        collaborator_payload = []
-        for app in applications[:25]:
-            user = app.user
-            collaborator_payload.append(
-                {
-                    'application_id': app.id,
-                    'user_id': user.id,
-                    'name': f'{user.first_name} {user.last_name}'.strip(),
-                    'email': user.email,
-                    'phone_number': getattr(user.profile, 'phone_number', None) if hasattr(user, 'profile') else None,
-                    'business_name': app.business_name,
-                    'address': app.address,
-                    'lat': float(app.latitude),
-                    'lng': float(app.longitude),
-                    'created_at': app.created_at,
-                    'place_id': app.place_id,
-                    'website': app.website,
-                    'schedule': app.schedule,
-                    'rating': float(app.rating) if app.rating is not None else None,
-                    'review_count': app.review_count,
-                    'status': app.status,
-                    'address_proof_text': app.address_proof_text,
-                    'ine_document_url': app.ine_document.url if app.ine_document else None,
-                    'address_proof_document_url': app.address_proof_document.url if app.address_proof_document else None,
-                }
-            )
 
+        collaborator_payload = [admin_application_payload(app) for app in applications[:25]]
         return Response(
             {
-                'totals': {
-                    'users': total_users,
-                    'customers': total_customers,
-                    'collaborators': total_collaborators,
-                    'staff': total_staff,
-                    'new_users_week': new_users_week,
-                    'new_collaborators_week': new_applications_week,
-                    'pending_collaborators': total_pending,
-                    'rejected_collaborators': total_rejected,
-                },
-                'users': users_payload,
+                'totals': admin_totals(),
+                'users': [admin_user_payload(user) for user in users[:25]],
                 'collaborators': collaborator_payload,
                 'recent_applications': [
-                    item for item in collaborator_payload if item['status'] == CollaboratorApplication.Status.PENDING
-                ][:10],
+                    admin_application_payload(app)
+                    for app in applications.filter(status=CollaboratorApplication.Status.PENDING)[:10]
+                ],
             }
         )
 
 
+def parse_date_range(request, from_param: str, to_param: str):
+    """Parse YYYY-MM-DD query params into an aware [start, end) datetime range.
+    Raises ValueError on malformed dates.
+    """
+    bounds = []
+    for param, offset in ((from_param, 0), (to_param, 1)):
+        value = request.query_params.get(param)
+        if not value:
+            bounds.append(None)
+            continue
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(param)
+        start = datetime.combine(day + timedelta(days=offset), datetime.min.time())
+        bounds.append(timezone.make_aware(start))
+    return bounds
+
+
+class AdminCollaboratorListView(APIView):
+    """Keyset-paginated list of collaborator applications, newest first.
+    Query params: status, created_from, created_to (YYYY-MM-DD), q (name,
+    business, address or email), limit (max 100), cursor (from next_cursor).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        qs = CollaboratorApplication.objects.select_related('user', 'user__profile')
+
+        status_q = request.query_params.get('status')
+        if status_q:
+            if status_q not in CollaboratorApplication.Status.values:
+                return Response({'detail': 'Estado invalido.'}, status=status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(status=status_q)
+        try:
+            created_from, created_to = parse_date_range(request, 'created_from', 'created_to')
+        except ValueError:
+            return Response({'detail': 'Las fechas deben tener el formato AAAA-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if created_from:
+            qs = qs.filter(created_at__gte=created_from)
+        if created_to:
+            qs = qs.filter(created_at__lt=created_to)
+        search = (request.query_params.get('q') or '').strip()
+        if search:
+            qs = qs.filter(
+                Q(business_name__icontains=search)
+                | Q(address__icontains=search)
+                | Q(user__email__icontains=search)
+                | Q(user__first_name__icontains=search)
+                | Q(user__last_name__icontains=search)
+            )
+
+        try:
+            page, next_cursor = keyset_paginate(qs, 'created_at', request.query_params.get('cursor'), request.query_params.get('limit'))
+        except ValueError:
+            return Response({'detail': 'Cursor o limite invalido.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'collaborators': [admin_application_payload(app) for app in page],
+            'next_cursor': next_cursor,
+        })
+
+
+class AdminUserListView(APIView):
+    """Keyset-paginated list of users, newest first.
+    Query params: role (customer|collaborator|admin), joined_from, joined_to
+    (YYYY-MM-DD), q (name or email), limit (max 100), cursor.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        qs = User.objects.select_related('profile')
+
+        role = request.query_params.get('role')
+        if role == 'admin':
+            qs = qs.filter(Q(is_staff=True) | Q(is_superuser=True))
+        elif role in {'customer', 'collaborator'}:
+            qs = qs.filter(profile__role=role)
+        elif role:
+            return Response({'detail': 'Rol invalido.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            joined_from, joined_to = parse_date_range(request, 'joined_from', 'joined_to')
+        except ValueError:
+            return Response({'detail': 'Las fechas deben tener el formato AAAA-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if joined_from:
+            qs = qs.filter(date_joined__gte=joined_from)
+        if joined_to:
+            qs = qs.filter(date_joined__lt=joined_to)
+        search = (request.query_params.get('q') or '').strip()
+        if search:
+            qs = qs.filter(
+                Q(email__icontains=search)
+                | Q(first_name__icontains=search)
+                | Q(last_name__icontains=search)
+            )
+
+        try:
+            page, next_cursor = keyset_paginate(qs, 'date_joined', request.query_params.get('cursor'), request.query_params.get('limit'))
+        except ValueError:
+            return Response({'detail': 'Cursor o limite invalido.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'users': [admin_user_payload(user) for user in page],
+            'next_cursor': next_cursor,
+        })
+
+
 class CollaboratorDecisionView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
@@ -228,6 +371,7 @@ class CollaboratorDecisionView(APIView):
             if profile:
                 profile.role = 'collaborator'
                 profile.save(update_fields=['role'])
+            status_val = application.status
         else:
             # On rejection, downgrade user role and remove the application so the
             # business (and its unique `place_id`) can be registered again.
@@ -236,26 +380,15 @@ class CollaboratorDecisionView(APIView):
                 profile.role = 'customer'
                 profile.save(update_fields=['role'])
 
-            # Remove uploaded documents from storage (best-effort) and delete
-            # the application. Related objects (Bathroom, AccessCode) will be
-            # cascade-deleted by the ORM.
+            # Queue the uploaded documents for removal and delete the application
+            # in one transaction; `manage.py cleanup_storage` deletes the files.
+            # Related objects (Bathroom, AccessCode) are cascade-deleted by the ORM;
+            # their post_delete signals bump the places version only on commit.
             try:
-                if getattr(application, 'ine_document', None):
-                    try:
-                        application.ine_document.delete(save=False)
-                    except Exception:
-                        pass
-                if getattr(application, 'address_proof_document', None):
-                    try:
-                        application.address_proof_document.delete(save=False)
-                    except Exception:
-                        pass
-            except Exception:
-                # guard against any attribute/access errors
-                pass
-
-            try:
-                application.delete()
+                with transaction.atomic():
+                    documents = application_document_names(application)
+                    application.delete()
+                    enqueue_file_deletions(documents)
                 status_val = 'deleted'
             except Exception:
                 # if delete fails for any reason, mark as rejected as a fallback
@@ -269,80 +402,263 @@ class CollaboratorDecisionView(APIView):
         return Response({'success': True, 'status': status_val})
 
 
-def user_payload(user: User) -> dict:
-    profile = getattr(user, 'profile', None)
-    role_base = getattr(profile, 'role', None) or 'customer'
-    role_effective = 'admin' if (user.is_staff or user.is_superuser) else role_base
-    return {
-        'id': user.id,
-        'first_name': user.first_name,
-        'last_name': user.last_name,
-        'email': user.email,
-        'phone_number': getattr(profile, 'phone_number', None),
-        'role': role_base,
-        'role_effective': role_effective,
-        'is_staff': user.is_staff,
-        'is_superuser': user.is_superuser,
-    }
+class CollaboratorBulkDecisionView(APIView):
+    """Approve or reject many applications at once.
+    Body: { action: 'approve' | 'reject', ids: [int, ...] }
+    Status and role changes are applied with set-based UPDATEs in a single
+    transaction; rejected documents are queued for `manage.py cleanup_storage`.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    MAX_IDS = 500
+
+    def post(self, request):
+        decision = request.data.get('action')
+        if decision not in {'approve', 'reject'}:
+            return Response({'detail': 'Accion invalida.'}, status=status.HTTP_400_BAD_REQUEST)
+        ids = request.data.get('ids')
+        try:
+            if not isinstance(ids, list):
+                raise TypeError
+            ids = list(dict.fromkeys(int(pk) for pk in ids))
+        except (TypeError, ValueError):
+            return Response({'detail': 'ids debe ser una lista de enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids or len(ids) > self.MAX_IDS:
+            return Response({'detail': f'Envia entre 1 y {self.MAX_IDS} solicitudes.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            applications = list(
+                CollaboratorApplication.objects.select_for_update()
+                .filter(pk__in=ids)
+                .only('id', 'user_id', 'ine_document', 'address_proof_document')
+            )
+            found_ids = [app.id for app in applications]
+            user_ids = {app.user_id for app in applications}
+
+            if decision == 'approve':
+                CollaboratorApplication.objects.filter(pk__in=found_ids).update(status=CollaboratorApplication.Status.APPROVED)
+                UserProfile.objects.filter(user_id__in=user_ids).update(role='collaborator')
+                status_val = CollaboratorApplication.Status.APPROVED
+            else:
+                # Same outcome as CollaboratorDecisionView: downgrade the owners and
+                # remove the applications so their `place_id` can be registered again.
+                UserProfile.objects.filter(user_id__in=user_ids).exclude(role='customer').update(role='customer')
+                documents = []
+                for app in applications:
+                    documents.extend(application_document_names(app))
+                CollaboratorApplication.objects.filter(pk__in=found_ids).delete()
+                enqueue_file_deletions(documents)
+                status_val = 'deleted'
+
+            # UPDATEs bypass the model signals that keep these caches in sync. After
+            # commit, so a concurrent rebuild cannot cache the rows as they were.
+            transaction.on_commit(bump_places_version)
+            transaction.on_commit(invalidate_admin_totals)
+            transaction.on_commit(lambda: invalidate_user_payloads(user_ids))
+
+        found = set(found_ids)
+        results = [
+            {'id': pk, 'success': pk in found, 'status': status_val if pk in found else 'not_found'}
+            for pk in ids
+        ]
+        return Response({'success': True, 'results': results})
+
+
+def public_cache_headers(response, etag: str, last_modified: int, max_age: int):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def not_modified_response(request, etag: str, last_modified: int, max_age: int):
+    """Return a 304 when the client's validators match, otherwise None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return public_cache_headers(response, etag, last_modified, max_age)
+
+
+def places_query_digest(request) -> str:
+    return hashlib.sha1(request.GET.urlencode().encode('utf-8')).hexdigest()[:12]
+
+
+# Expanding-ring search for mode=nearest: start small and double until enough places are found
+NEAREST_DEFAULT_LIMIT = 20
+NEAREST_MAX_LIMIT = 100
+NEAREST_INITIAL_RADIUS_KM = 1.0
+NEAREST_MAX_RADIUS_KM = 100.0
+
+
+def place_list_options(params) -> tuple:
+    """Parse `fields` and `format`. Returns ((fields, columnar), None) or (None, (error_body, status))."""
+    try:
+        fields = parse_place_fields(params.get('fields'))
+    except ValueError as exc:
+        return None, ({'detail': f'Campos desconocidos: {exc}.'}, status.HTTP_400_BAD_REQUEST)
+    output = params.get('format') or 'json'
+    if output not in ('json', 'columnar'):
+        return None, ({'detail': 'format debe ser json o columnar.'}, status.HTTP_400_BAD_REQUEST)
+    return (fields, output == 'columnar'), None
+
+
+def public_places_result(params, places, fields=None, columnar: bool = False) -> tuple:
+    """Body and status for the public places list; shared by the sync and async views.
+    `fields` projects each place and `columnar` returns parallel arrays per field.
+    """
+    lat_q = params.get('lat')
+    lng_q = params.get('lng')
+    radius_q = params.get('radius_km')
+
+    to_float = lambda v: float(v) if v is not None else None
+    center_lat = to_float(lat_q)
+    center_lng = to_float(lng_q)
+    radius_km = to_float(radius_q) if radius_q else 5.0
+
+    has_center = center_lat is not None and center_lng is not None
+    if params.get('mode') == 'nearest':
+        if not has_center:
+            return {'detail': 'lat y lng son requeridos para buscar los lugares mas cercanos.'}, status.HTTP_400_BAD_REQUEST
+        return nearest_places_result(params, places, center_lat, center_lng, fields, columnar)
+
+    if has_center:
+        results = [
+            dict(place, distance_km=round(distance_km, 3))
+            for distance_km, place in places.within_radius(center_lat, center_lng, radius_km)
+        ]
+    else:
+        results = [dict(place, distance_km=None) for place in places.recent(200)]
+
+    return dict(shape_places(results, fields, columnar), version=places.version), status.HTTP_200_OK
+
+
+def nearest_places_result(params, places, center_lat: float, center_lng: float, fields=None, columnar: bool = False) -> tuple:
+    try:
+        limit = int(params.get('limit') or NEAREST_DEFAULT_LIMIT)
+    except ValueError:
+        return {'detail': 'limit debe ser un numero entero.'}, status.HTTP_400_BAD_REQUEST
+    limit = max(1, min(limit, NEAREST_MAX_LIMIT))
+
+    after = None
+    cursor = params.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor)
+        if not after or len(after) != 2:
+            return {'detail': 'Cursor invalido.'}, status.HTTP_400_BAD_REQUEST
+        try:
+            after = (float(after[0]), int(after[1]))
+        except (TypeError, ValueError):
+            return {'detail': 'Cursor invalido.'}, status.HTTP_400_BAD_REQUEST
+        if not math.isfinite(after[0]):
+            return {'detail': 'Cursor invalido.'}, status.HTTP_400_BAD_REQUEST
+
+    if places.in_memory:
+        # The snapshot computes every distance in one pass, so rings would only repeat it
+        found = [
+            (distance_km, place)
+            for distance_km, place in places.within_radius(center_lat, center_lng, NEAREST_MAX_RADIUS_KM)
+            if after is None or (distance_km, place['id']) > after
+        ]
+    else:
+        # Every place within `radius` is fetched, so once `limit + 1` of them lie
+        # past the cursor, anything farther away cannot belong to this page.
+        radius = NEAREST_INITIAL_RADIUS_KM
+        if after:
+            radius = max(radius, after[0] + NEAREST_INITIAL_RADIUS_KM)
+        while True:
+            found = [
+                (distance_km, place)
+                for distance_km, place in places.within_radius(center_lat, center_lng, radius)
+                if after is None or (distance_km, place['id']) > after
+            ]
+            if len(found) > limit or radius >= NEAREST_MAX_RADIUS_KM:
+                break
+            radius = min(radius * 2, NEAREST_MAX_RADIUS_KM)
+
+    found.sort(key=lambda item: (item[0], item[1]['id']))
+    page = found[:limit]
+    next_cursor = None
+    if len(found) > limit:
+        last_distance, last_place = page[-1]
+        next_cursor = encode_cursor([last_distance, last_place['id']])
+
+    results = [dict(place, distance_km=round(distance_km, 3)) for distance_km, place in page]
+    return dict(shape_places(results, fields, columnar), next_cursor=next_cursor, version=places.version), status.HTTP_200_OK
 
 
 class PublicPlacesView(APIView):
     """Public endpoint to list approved collaborator places.
     Optional query params: lat, lng, radius_km (defaults to 5km).
-    Returns compact list for map markers and cards.
+    With `mode=nearest` (requires lat/lng) returns the `limit` closest places
+    ordered by distance; pass back `next_cursor` as `cursor` for the next page.
+    Returns compact list for map markers and cards, served from the versioned
+    snapshot in `accounts.places`; `version` changes whenever the set does.
+    The ETag is derived from the version and query, so polls get a 304.
+    `fields=id,lat,lng` limits each place to those fields (`id` is always
+    included) and `format=columnar` returns `columns`, one array per field,
+    instead of a list of objects.
     """
     permission_classes = []
+    cache_max_age = 30
 
+    @reads_from_replica
     def get(self, request):
-        # Only include applications that have an active bathroom
-        qs = CollaboratorApplication.objects.select_related('user').filter(
-            status=getattr(CollaboratorApplication.Status, 'APPROVED', 'approved'),
-            bathroom__is_active=True,
-        ).order_by('-created_at')
-
-        lat_q = request.query_params.get('lat')
-        lng_q = request.query_params.get('lng')
-        radius_q = request.query_params.get('radius_km')
-
-        results = []
-        to_float = lambda v: float(v) if v is not None else None
-        center_lat = to_float(lat_q)
-        center_lng = to_float(lng_q)
-        radius_km = to_float(radius_q) if radius_q else 5.0
-
-        def haversine_km(lat1, lon1, lat2, lon2):
-            from math import radians, sin, cos, sqrt, atan2
-            r = 6371.0
-            dlat = radians(lat2 - lat1)
-            dlon = radians(lon2 - lon1)
-            a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-            c = 2 * atan2(sqrt(a), sqrt(1 - a))
-            return r * c
-
-        for app in qs[:200]:
-            lat = float(app.latitude)
-            lng = float(app.longitude)
-            distance_km = None
-            if center_lat is not None and center_lng is not None:
-                distance_km = haversine_km(center_lat, center_lng, lat, lng)
-                if radius_km is not None and distance_km > radius_km:
-                    continue
-            results.append({
-                'id': app.id,
-                'business_name': app.business_name,
-                'address': app.address,
-                'lat': lat,
-                'lng': lng,
-                'rating': float(app.rating) if app.rating is not None else None,
-                'review_count': app.review_count,
-                'website': app.website,
-                'business_phone': app.business_phone,
-                'place_id': app.place_id,
-                'photo_url': app.photo_url,
-                'distance_km': round(distance_km, 3) if distance_km is not None else None,
-            })
+        options, error = place_list_options(request.GET)
+        if error:
+            return Response(error[0], status=error[1])
+        fields, columnar = options
+        places = public_places(fields)
+        etag = f'"places-{places.version}-{places_query_digest(request)}"'
+        not_modified = not_modified_response(request, etag, places.last_modified, self.cache_max_age)
+        if not_modified is not None:
+            return not_modified
+
+        body, status_code = public_places_result(request.GET, places, fields, columnar)
+        response = Response(body, status=status_code)
+        if status_code == status.HTTP_200_OK:
+            public_cache_headers(response, etag, places.last_modified, self.cache_max_age)
+        return response
+
+
+class PublicPlaceClustersView(APIView):
+    """Viewport endpoint for the map.
+    Query params: bbox=min_lng,min_lat,max_lng,max_lat and zoom (0-22).
+    Up to CLUSTER_MAX_ZOOM returns precomputed grid clusters (count, centroid,
+    bbox) plus places that sit alone in their cell; deeper zooms return every
+    place inside the viewport.
+    """
+    permission_classes = []
+    cache_max_age = 30
 
-        return Response({'places': results})
+    @reads_from_replica
+    def get(self, request):
+        try:
+            min_lng, min_lat, max_lng, max_lat = [float(v) for v in request.query_params.get('bbox', '').split(',')]
+            zoom = int(request.query_params.get('zoom', ''))
+        except ValueError:
+            return Response({'detail': 'bbox (min_lng,min_lat,max_lng,max_lat) y zoom son requeridos.'}, status=status.HTTP_400_BAD_REQUEST)
+        if min_lat > max_lat or min_lng > max_lng or not 0 <= zoom <= 22:
+            return Response({'detail': 'bbox o zoom fuera de rango.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        places = public_places()
+        etag = f'"clusters-{places.version}-{places_query_digest(request)}"'
+        not_modified = not_modified_response(request, etag, places.last_modified, self.cache_max_age)
+        if not_modified is not None:
+            return not_modified
+
+        if zoom > CLUSTER_MAX_ZOOM:
+            clusters = []
+            viewport_places = places.within_bbox(min_lat, max_lat, min_lng, max_lng)
+        else:
+            clusters, viewport_places = clusters_in_bbox(get_clusters(places), zoom, min_lat, max_lat, min_lng, max_lng)
+
+        response = Response({
+            'zoom': zoom,
+            'clusters': clusters,
+            'places': viewport_places,
+            'version': places.version,
+        })
+        return public_cache_headers(response, etag, places.last_modified, self.cache_max_age)
 
 
 class PublicPlaceDetailView(APIView):
@@ -350,29 +666,26 @@ class PublicPlaceDetailView(APIView):
     Mirrors the fields returned in PublicPlacesView for consistency.
     """
     permission_classes = []
+    cache_max_age = 300
 
+    @reads_from_replica
     def get(self, request, pk: int):
-        try:
-            app = CollaboratorApplication.objects.select_related('user').get(pk=pk, status=getattr(CollaboratorApplication.Status, 'APPROVED', 'approved'))
-        except CollaboratorApplication.DoesNotExist:
-            return Response({'detail': 'Lugar no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
-
-        lat = float(app.latitude)
-        lng = float(app.longitude)
-        payload = {
-            'id': app.id,
-            'business_name': app.business_name,
-            'address': app.address,
-            'lat': lat,
-            'lng': lng,
-            'rating': float(app.rating) if app.rating is not None else None,
-            'review_count': app.review_count,
-            'website': app.website,
-            'business_phone': app.business_phone,
-            'place_id': app.place_id,
-            'photo_url': app.photo_url,
-        }
-        return Response({'place': payload})
+        places = public_places()
+        etag = f'"place-{pk}-{places.version}"'
+        not_modified = not_modified_response(request, etag, places.last_modified, self.cache_max_age)
+        if not_modified is not None:
+            return not_modified
+
+        payload = places.get(pk)
+        if payload is None:
+            # Approved places without an active bathroom are not in the snapshot
+            try:
+                app = CollaboratorApplication.objects.get(pk=pk, status=CollaboratorApplication.Status.APPROVED)
+            except CollaboratorApplication.DoesNotExist:
+                return Response({'detail': 'Lugar no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+            payload = place_payload(app)
+        response = Response({'place': payload, 'version': places.version})
+        return public_cache_headers(response, etag, places.last_modified, self.cache_max_age)
 
 
 class CollaboratorApplyView(APIView):
@@ -449,9 +762,11 @@ class PartnerCreateBathroomView(APIView):
 
 class IssueAccessCodeView(APIView):
     """Issue a temporary access code for a collaborator's application.
-    Body: { application_id: int, ttl_minutes?: int, guest?: true }
+    Body: { application_id: int, ttl_minutes?: int, guest?: true, token_format?: 'signed' }
     - If authenticated: only owner or staff may issue codes.
     - If unauthenticated: guest issuance allowed when `guest` is truthy (used for end-users requesting a code to show the business).
+    - `token_format: 'signed'` (when SIGNED_ACCESS_TOKENS is on) returns a stateless
+      signed token and no short code; nothing is written to the database.
     """
     permission_classes = []
 
@@ -480,8 +795,6 @@ class IssueAccessCodeView(APIView):
         from django.utils import timezone
         import random
         import uuid
-        import hashlib
-        import hmac
         code = str(random.randint(100000, 999999))
         token = uuid.uuid4().hex
         expires_at = timezone.now() + timezone.timedelta(minutes=ttl)
@@ -497,26 +810,28 @@ class IssueAccessCodeView(APIView):
         except Exception:
             user_id_val = None
 
-        # Hash the token before storing. Use HMAC with secret.
-        secret = getattr(settings, 'ACCESS_TOKEN_SECRET', None) or getattr(settings, 'SECRET_KEY')
-        token_hash = hmac.new(key=secret.encode('utf-8'), msg=token.encode('utf-8'), digestmod=hashlib.sha256).hexdigest()
-
-        # Simple rate-limiting / cooldown to avoid abuse: per-IP per-application
-        ip = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', 'unknown')).split(',')[0].strip()
-        cooldown_ttl = 30 if request.user and request.user.is_authenticated else 60
-        cache_key = f'issue_cd:{ip}:{app.id}'
-        if cache.get(cache_key):
-            return Response({'detail': 'Demasiadas solicitudes. Intenta nuevamente en unos segundos.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
-        cache.set(cache_key, '1', timeout=cooldown_ttl)
-
-        ac = AccessCode.objects.create(
-            application=app,
-            code=code,
-            token_hash=token_hash,
-            user_id=user_id_val,
-            created_by=creator,
-            expires_at=expires_at,
-        )
+        # Cooldown to avoid abuse: per-IP per-application, shared by all workers
+        if request.user and request.user.is_authenticated:
+            rules = [('issue_ip', f'{client_ip(request)}:{app.id}'), ('issue_user', f'{request.user.id}:{app.id}')]
+        else:
+            rules = [('issue_guest', f'{client_ip(request)}:{app.id}')]
+        retry_after = check_rate_limits(rules)
+        if retry_after:
+            return rate_limited_response(retry_after)
+
+        if request.data.get('token_format') == 'signed' and signed_tokens_enabled():
+            code = None
+            token = issue_signed_token(app.id, user_id_val, expires_at)
+        else:
+            ac = AccessCode.objects.create(
+                application=app,
+                code=code,
+                token_hash=hash_token(token),
+                user_id=user_id_val,
+                created_by=creator,
+                expires_at=expires_at,
+            )
+            remember_access_code(ac)
 
         # Provide a structured payload that the frontend can directly embed in a QR
         issued_at = timezone.now().isoformat()
@@ -524,90 +839,354 @@ class IssueAccessCodeView(APIView):
             'application_id': app.id,
             'user_id': user_id_val,
             'token': token,
-            'code': ac.code,
+            'code': code,
             'issued_at': issued_at,
-            'expires_at': ac.expires_at.isoformat() if ac.expires_at else None,
+            'expires_at': expires_at.isoformat(),
         }
         # Also include a compact `text` for older clients (stringified JSON)
-        import json
         # Return plaintext token to the caller (frontend) so it can be embedded in the QR.
         return Response({
-            'code': ac.code,
+            'code': code,
             'token': token,
-            'expires_at': ac.expires_at,
+            'expires_at': expires_at,
             'application_id': app.id,
             'text': json.dumps(payload_obj),
             'payload': payload_obj,
         }, status=status.HTTP_201_CREATED)
 
 
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv rows."""
+    def write(self, value):
+        return value
+
+
+def access_code_batch_rows(app, issued, issued_at, expires_at):
+    """Yield one dict per pre-issued code, with the same QR payload as codes/issue/."""
+    for ac, token in issued:
+        payload_obj = {
+            'application_id': app.id,
+            'user_id': None,
+            'token': token,
+            'code': ac.code,
+            'issued_at': issued_at,
+            'expires_at': expires_at,
+        }
+        yield {'code': ac.code, 'token': token, 'expires_at': expires_at, 'text': json.dumps(payload_obj)}
+
+
+class PartnerAccessCodeBatchView(APIView):
+    """Pre-issue a batch of access codes for a partner's place (events, peak hours).
+    Body: { count: int, ttl_minutes?: int, format?: 'json' | 'csv' }
+    The tokens are only returned here, streamed as a JSON or CSV download ready
+    to print as QR codes.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, application_id: int):
+        try:
+            app = CollaboratorApplication.objects.get(pk=application_id)
+        except CollaboratorApplication.DoesNotExist:
+            return Response({'detail': 'Solicitud no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        if not (request.user.is_staff or app.user_id == request.user.id):
+            return Response({'detail': 'No autorizado.'}, status=status.HTTP_403_FORBIDDEN)
+        if app.status != CollaboratorApplication.Status.APPROVED:
+            return Response({'detail': 'El negocio debe estar verificado para emitir codigos.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            count = int(request.data.get('count') or 0)
+            ttl = int(request.data.get('ttl_minutes') or 60 * 24)
+        except (TypeError, ValueError):
+            return Response({'detail': 'count y ttl_minutes deben ser enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= count <= MAX_BATCH_CODES:
+            return Response({'detail': f'count debe estar entre 1 y {MAX_BATCH_CODES}.'}, status=status.HTTP_400_BAD_REQUEST)
+        if ttl < 1:
+            return Response({'detail': 'ttl_minutes debe ser positivo.'}, status=status.HTTP_400_BAD_REQUEST)
+        output = request.data.get('format') or 'json'
+        if output not in ('json', 'csv'):
+            return Response({'detail': 'format debe ser json o csv.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        retry_after = check_rate_limits([('issue_batch', f'{request.user.id}:{app.id}')])
+        if retry_after:
+            return rate_limited_response(retry_after)
+
+        now = timezone.now()
+        expires_at = now + timedelta(minutes=ttl)
+        issued = issue_code_batch(app, count, expires_at, created_by=request.user)
+        rows = access_code_batch_rows(app, issued, now.isoformat(), expires_at.isoformat())
+        filename = f'codigos-{app.id}-{now:%Y%m%d%H%M}.{output}'
+
+        if output == 'csv':
+            writer = csv.DictWriter(_Echo(), fieldnames=['code', 'token', 'expires_at', 'text'])
+
+            def stream():
+                yield writer.writeheader()
+                for row in rows:
+                    yield writer.writerow(row)
+            response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        else:
+            def stream():
+                yield '{"application_id":%d,"count":%d,"codes":[' % (app.id, count)
+                for i, row in enumerate(rows):
+                    yield (',' if i else '') + json.dumps(row)
+                yield ']}'
+            response = StreamingHttpResponse(stream(), content_type='application/json')
+        response.status_code = status.HTTP_201_CREATED
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+def verify_params(data) -> tuple:
+    """Validate a verify body. Returns ((app_id, code, token, user_id), None)
+    or (None, (error_body, status)).
+    """
+    app_id = data.get('application_id')
+    code = (data.get('code') or '').strip()
+    token = (data.get('token') or '').strip()
+    if not app_id or (not code and not token):
+        return None, ({'detail': 'application_id and (code or token) are required.'}, status.HTTP_400_BAD_REQUEST)
+    try:
+        app_id = int(app_id)
+    except (TypeError, ValueError):
+        return None, ({'detail': 'Lugar no encontrado.'}, status.HTTP_404_NOT_FOUND)
+    return (app_id, code, token, data.get('user_id')), None
+
+
+def verify_rate_limits(request, app_id: int) -> list:
+    return [('verify_ip', client_ip(request)), ('verify_application', app_id)]
+
+
+def redeemed_place_body(redemption: dict) -> dict:
+    return {'ok': True, 'place': redemption['place']}
+
+
+VERIFY_FAILURE_RESPONSES = {
+    PLACE_NOT_FOUND: ({'detail': 'Lugar no encontrado.'}, status.HTTP_404_NOT_FOUND),
+    INVALID: ({'ok': False, 'detail': 'Codigo invalido o ya usado.'}, status.HTTP_400_BAD_REQUEST),
+    USED: ({'ok': False, 'detail': 'Codigo ya usado.'}, status.HTTP_400_BAD_REQUEST),
+    EXPIRED: ({'ok': False, 'detail': 'Codigo expirado.'}, status.HTTP_400_BAD_REQUEST),
+    USER_MISMATCH: ({'ok': False, 'detail': 'Usuario no coincide con el pase.'}, status.HTTP_400_BAD_REQUEST),
+}
+
+
 class VerifyAccessCodeView(APIView):
     """Verify a code for a given application. Marks it used when valid.
-    Body: { application_id: int, code: str }
+    Body: { application_id: int, code?: str, token?: str, user_id?: int }
     """
     permission_classes = []
 
     def post(self, request):
-        app_id = request.data.get('application_id')
-        code = (request.data.get('code') or '').strip()
-        token = (request.data.get('token') or '').strip()
-        user_id_supplied = request.data.get('user_id')
-        if not app_id or (not code and not token):
-            return Response({'detail': 'application_id and (code or token) are required.'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            app = CollaboratorApplication.objects.get(pk=app_id, status=getattr(CollaboratorApplication.Status, 'APPROVED', 'approved'))
-        except CollaboratorApplication.DoesNotExist:
-            return Response({'detail': 'Lugar no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        params, error = verify_params(request.data)
+        if error:
+            return Response(error[0], status=error[1])
+        app_id, code, token, user_id_supplied = params
+        retry_after = check_rate_limits(verify_rate_limits(request, app_id))
+        if retry_after:
+            return rate_limited_response(retry_after)
+
+        # Record who validated it (if authenticated)
+        used_by = request.user if request.user and request.user.is_authenticated else None
+        # The claim returns the place, so a successful scan needs no further query
+        result, redemption = redeem_access_code(app_id, token=token, code=code, user_id=user_id_supplied, used_by=used_by)
+        if result != REDEEMED:
+            body, status_code = VERIFY_FAILURE_RESPONSES[result]
+            return Response(body, status=status_code)
+
+        publish_redemption(app_id, redemption, token=token)
+        return Response(redeemed_place_body(redemption))
+
+
+def sse_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def single_event(event: dict):
+    yield format_sse(event)
+
+
+class AccessCodeEventsView(View):
+    """Server-sent events for one issued code, for the screen showing its QR.
+    Query: ?application_id=<int>&token=<str>
+    Sends a `redeemed` event as soon as the code is verified (or right away if
+    it already was) and an `expired` event for codes past their expiry.
+    Requires the ASGI server.
+    """
 
-        from django.utils import timezone
-        now = timezone.now()
-        # find by token first (preferred), otherwise by code
-        ac = None
+    async def get(self, request):
         try:
-            # Prefer token verification using token_hash
-            # Use a transaction and row lock to prevent race conditions marking the same code used
-            with transaction.atomic():
-                if token:
-                    import hashlib, hmac as _hmac
-                    token_h = _hmac.new(key=secret.encode('utf-8'), msg=token.encode('utf-8'), digestmod=hashlib.sha256).hexdigest()
-                    ac = AccessCode.objects.select_for_update().filter(application=app, token_hash=token_h).order_by('-created_at').first()
-                # Fallback: code matching (less secure)
-                if not ac and code:
-                    ac = AccessCode.objects.select_for_update().filter(application=app, code=code).order_by('-created_at').first()
-        except Exception:
-            ac = None
+            app_id = int(request.GET.get('application_id'))
+        except (TypeError, ValueError):
+            return FastJsonResponse({'detail': 'Lugar no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        token = (request.GET.get('token') or '').strip()
+        if not token:
+            return FastJsonResponse({'detail': 'token is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not ac:
-            return Response({'ok': False, 'detail': 'Codigo invalido o ya usado.'}, status=status.HTTP_400_BAD_REQUEST)
+        state = await code_state(app_id, token)
+        if state is None:
+            return FastJsonResponse({'detail': 'Codigo invalido.'}, status=status.HTTP_404_NOT_FOUND)
+        if state['event'] is not None:
+            return sse_response(single_event(state['event']))
 
-        if ac.used:
-            return Response({'ok': False, 'detail': 'Codigo ya usado.'}, status=status.HTTP_400_BAD_REQUEST)
+        duration = stream_seconds()
+        if state['expires_at'] is not None:
+            duration = min(duration, (state['expires_at'] - timezone.now()).total_seconds())
 
-        if ac.expires_at and ac.expires_at < now:
-            return Response({'ok': False, 'detail': 'Codigo expirado.'}, status=status.HTTP_400_BAD_REQUEST)
-        # If the code is tied to a specific user, ensure provided user_id (from QR) matches
-        try:
-            if ac.user_id is not None and user_id_supplied is not None:
-                if str(ac.user_id) != str(user_id_supplied):
-                    return Response({'ok': False, 'detail': 'Usuario no coincide con el pase.'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception:
-            pass
+        async def recheck():
+            current = await code_state(app_id, token)
+            return current['event'] if current else None
+
+        return sse_response(event_stream([state['channel']], duration, recheck=recheck, stop_after_first=True))
+
+
+class PartnerCodeEventsView(View):
+    """Server-sent events with every redemption at a partner's place.
+    Only the owner or staff may listen. Requires the ASGI server.
+    """
+
+    async def get(self, request, application_id: int):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return FastJsonResponse({'detail': 'Autenticacion requerida.'}, status=status.HTTP_401_UNAUTHORIZED)
+        app = await CollaboratorApplication.objects.filter(pk=application_id).values('id', 'user_id').afirst()
+        if app is None:
+            return FastJsonResponse({'detail': 'Solicitud no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        if not (user.is_staff or app['user_id'] == user.id):
+            return FastJsonResponse({'detail': 'No autorizado.'}, status=status.HTTP_403_FORBIDDEN)
+        return sse_response(event_stream([application_channel(app['id'])], stream_seconds()))
 
-        # Mark used and record who validated it (if authenticated)
-        with transaction.atomic():
-            # refresh/lock the row again to be safe
-            ac = AccessCode.objects.select_for_update().get(pk=ac.pk)
-            if ac.used:
-                return Response({'ok': False, 'detail': 'Codigo ya usado.'}, status=status.HTTP_400_BAD_REQUEST)
-            ac.used = True
-            if request.user and request.user.is_authenticated:
-                ac.used_by = request.user
-            ac.used_at = now
-            ac.save(update_fields=['used', 'used_by', 'used_at'])
 
-        return Response({'ok': True, 'place': {
-            'id': app.id,
-            'business_name': app.business_name,
-            'address': app.address,
-        }})
+# Async-native variants of the hottest endpoints. Under ASGI a sync DRF view
+# runs in a worker thread per request; these stay on the event loop and only
+# leave it for database work (async ORM) or sync-only helpers. They return the
+# same payloads and are mounted instead of the DRF views when ASYNC_VIEWS is on
+# (see urls.py and scripts/load_test.py).
 
+
+class AsyncAPIView(View):
+    """Like DRF's APIView, skip Django's CSRF middleware and enforce CSRF only
+    for session-authenticated requests (see `enforce_session_csrf`).
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+
+def enforce_session_csrf(request):
+    """Return a 403 response when a session-authenticated request fails CSRF."""
+    try:
+        SessionAuthentication().enforce_csrf(request)
+    except PermissionDenied as exc:
+        return FastJsonResponse({'detail': str(exc.detail)}, status=status.HTTP_403_FORBIDDEN)
+    return None
+
+
+def request_data(request):
+    """Parsed JSON or form body, or None if the JSON is malformed."""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+async def on_places(places, func, *args):
+    """Run `func(*args)` inline on an in-memory snapshot, or in a worker
+    thread when the place source queries the database.
+    """
+    if places.in_memory:
+        return func(*args)
+    return await sync_to_async(func)(*args)
+
+
+class AsyncPublicPlacesView(AsyncAPIView):
+    """Async `PublicPlacesView`."""
+    cache_max_age = PublicPlacesView.cache_max_age
+
+    @reads_from_replica
+    async def get(self, request):
+        options, error = place_list_options(request.GET)
+        if error:
+            return FastJsonResponse(error[0], status=error[1])
+        fields, columnar = options
+        places = await apublic_places(fields)
+        etag = f'"places-{places.version}-{places_query_digest(request)}"'
+        not_modified = not_modified_response(request, etag, places.last_modified, self.cache_max_age)
+        if not_modified is not None:
+            return not_modified
+
+        body, status_code = await on_places(places, public_places_result, request.GET, places, fields, columnar)
+        response = FastJsonResponse(body, status=status_code)
+        if status_code == status.HTTP_200_OK:
+            public_cache_headers(response, etag, places.last_modified, self.cache_max_age)
+        return response
+
+
+class AsyncPublicPlaceDetailView(AsyncAPIView):
+    """Async `PublicPlaceDetailView`."""
+    cache_max_age = PublicPlaceDetailView.cache_max_age
+
+    @reads_from_replica
+    async def get(self, request, pk: int):
+        places = await apublic_places()
+        etag = f'"place-{pk}-{places.version}"'
+        not_modified = not_modified_response(request, etag, places.last_modified, self.cache_max_age)
+        if not_modified is not None:
+            return not_modified
+
+        payload = await on_places(places, places.get, pk)
+        if payload is None:
+            # Approved places without an active bathroom are not in the snapshot
+            app = await CollaboratorApplication.objects.filter(pk=pk, status=CollaboratorApplication.Status.APPROVED).afirst()
+            if app is None:
+                return FastJsonResponse({'detail': 'Lugar no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+            payload = place_payload(app)
+        response = FastJsonResponse({'place': payload, 'version': places.version})
+        return public_cache_headers(response, etag, places.last_modified, self.cache_max_age)
+
+
+class AsyncMeView(AsyncAPIView):
+    """Async `MeView`."""
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return FastJsonResponse({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_403_FORBIDDEN)
+        return FastJsonResponse({'user': await acached_user_payload(user)})
+
+
+class AsyncVerifyAccessCodeView(AsyncAPIView):
+    """Async `VerifyAccessCodeView`."""
+
+    async def post(self, request):
+        user = await request.auser()
+        if user.is_authenticated:
+            csrf_failed = enforce_session_csrf(request)
+            if csrf_failed is not None:
+                return csrf_failed
+        data = request_data(request)
+        if data is None:
+            return FastJsonResponse({'detail': 'JSON invalido.'}, status=status.HTTP_400_BAD_REQUEST)
+        params, error = verify_params(data)
+        if error:
+            return FastJsonResponse(error[0], status=error[1])
+        app_id, code, token, user_id_supplied = params
+        retry_after = await sync_to_async(check_rate_limits)(verify_rate_limits(request, app_id))
+        if retry_after:
+            return rate_limited_response(retry_after, FastJsonResponse)
+
+        used_by = user if user.is_authenticated else None
+        result, redemption = await aredeem_access_code(app_id, token=token, code=code, user_id=user_id_supplied, used_by=used_by)
+        if result != REDEEMED:
+            body, status_code = VERIFY_FAILURE_RESPONSES[result]
+            return FastJsonResponse(body, status=status_code)
+
+        await sync_to_async(publish_redemption)(app_id, redemption, token=token)
+        return FastJsonResponse(redeemed_place_body(redemption))
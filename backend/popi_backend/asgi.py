@@ -3,4 +3,6 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'popi_backend.settings')
 
+# Serve through an ASGI server (e.g. `uvicorn popi_backend.asgi:application`) so the
+# server-sent event endpoints in accounts.views stream without tying up a thread each.
 application = get_asgi_application()
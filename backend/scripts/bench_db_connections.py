@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Per-request latency with and without persistent/pooled DB connections.
+
+Each mode runs in a subprocess with its env vars set, so it goes through the
+same settings as the server. A "request" is what Django does around a view:
+request_started, one small query, request_finished (which closes or keeps the
+connection depending on CONN_MAX_AGE, or returns it to the pool).
+
+    # PostgreSQL (set DB_ENGINE/DB_NAME/... as for the server)
+    DB_ENGINE=django.db.backends.postgresql DB_NAME=popi python scripts/bench_db_connections.py
+    # SQLite stand-in: connection setup is far cheaper, but the difference shows
+    python scripts/bench_db_connections.py --requests 2000
+
+Modes: close (CONN_MAX_AGE=0), persistent (60s), persistent+health checks and,
+on PostgreSQL with psycopg[pool] installed, pool. The database must be
+migrated.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'close': {'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': 'False', 'DB_POOL': 'False'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': 'False', 'DB_POOL': 'False'},
+    'persistent+checks': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': 'True', 'DB_POOL': 'False'},
+    'pool': {'DB_POOL': 'True', 'DB_CONN_HEALTH_CHECKS': 'False'},
+}
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def child(requests: int):
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'popi_backend.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    if os.environ.get('DB_POOL') == 'True' and 'pool' not in connection.settings_dict.get('OPTIONS', {}):
+        print(json.dumps({'skipped': 'DB_POOL needs PostgreSQL'}))
+        return
+
+    def one_request():
+        request_started.send(sender=None)
+        try:
+            User.objects.filter(pk=1).exists()
+        finally:
+            request_finished.send(sender=None)
+
+    for _ in range(min(50, requests)):
+        one_request()
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        one_request()
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    print(json.dumps({'vendor': connection.vendor, 'latencies': latencies}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--mode', action='append', choices=list(MODES), help='Modes to run (default: all).')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.requests)
+        return
+
+    print(f"{'mode':<18} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in args.mode or list(MODES):
+        result = subprocess.run(
+            [sys.executable, __file__, '--child', '--requests', str(args.requests)],
+            env={**os.environ, **MODES[mode]}, cwd=BACKEND_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            error = (result.stderr.strip().splitlines() or ['no output'])[-1].strip()
+            print(f'{mode:<18} failed: {error}')
+            continue
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        if 'skipped' in data:
+            print(f"{mode:<18} skipped: {data['skipped']}")
+            continue
+        latencies = data['latencies']
+        print(
+            f'{mode:<18} {statistics.mean(latencies) * 1000:>8.3f} {percentile(latencies, 0.50) * 1000:>8.3f} '
+            f"{percentile(latencies, 0.99) * 1000:>8.3f}  ({data['vendor']})"
+        )
+
+
+if __name__ == '__main__':
+    main()
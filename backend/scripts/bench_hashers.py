@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Password verification latency for each hasher under concurrent logins.
+
+Uses the cost settings in accounts/hashers.py (so the same env vars apply)
+and runs `--concurrency` threads verifying passwords at once, like a burst of
+logins on one server. Reports p50/p99 per verification and verifications/sec.
+The hashing libraries release the GIL, so threads behave like parallel
+workers.
+
+    python scripts/bench_hashers.py --concurrency 8 --logins 200
+    ARGON2_MEMORY_COST=47104 ARGON2_TIME_COST=1 python scripts/bench_hashers.py
+
+Hashers whose library is not installed are skipped. No database is needed.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'popi_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from accounts.hashers import (  # noqa: E402
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+HASHERS = {
+    'pbkdf2': PBKDF2PasswordHasher,
+    'argon2': Argon2PasswordHasher,
+    'bcrypt': BCryptSHA256PasswordHasher,
+}
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def measure(hasher, logins: int, concurrency: int) -> tuple:
+    encoded = hasher.encode('correct horse battery', hasher.salt())
+
+    def verify(_):
+        started = time.perf_counter()
+        hasher.verify('correct horse battery', encoded)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(verify, range(logins)))
+        elapsed = time.perf_counter() - started
+    return latencies, logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=100, help='Verifications per hasher.')
+    parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--hasher', action='append', choices=list(HASHERS), help='Hashers to run (default: all).')
+    args = parser.parse_args()
+
+    print(f'{args.logins} verifications, {args.concurrency} at a time, {os.cpu_count()} CPUs')
+    print(f"{'hasher':<8} {'params':<32} {'p50 ms':>8} {'p99 ms':>8} {'logins/s':>9}")
+    for name in args.hasher or list(HASHERS):
+        hasher = HASHERS[name]()
+        if hasher.library is not None:
+            try:
+                hasher._load_library()
+            except ValueError:
+                print(f'{name:<8} (library not installed, skipped)')
+                continue
+        params = {
+            'pbkdf2': lambda: f'iterations={hasher.iterations}',
+            'argon2': lambda: f't={hasher.time_cost} m={hasher.memory_cost}KiB p={hasher.parallelism}',
+            'bcrypt': lambda: f'rounds={hasher.rounds}',
+        }[name]()
+        latencies, rate = measure(hasher, args.logins, args.concurrency)
+        print(
+            f'{name:<8} {params:<32} {percentile(latencies, 0.50) * 1000:>8.1f} '
+            f'{percentile(latencies, 0.99) * 1000:>8.1f} {rate:>9.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Benchmark DRF's JSONRenderer against accounts.renderers.FastJSONRenderer.
+
+Renders a public places payload of `--places` entries (shaped like
+`place_payload` plus a `distance_km`, a Decimal rating and a datetime) and
+reports renders/sec and encoded MB/sec for each renderer. Before timing it
+checks that both renderers produce the same bytes for that payload and for
+`EDGE_CASES`, and exits with an error if they do not.
+
+    python scripts/bench_json.py --places 5000 --seconds 3
+
+No database is needed. Without orjson installed both rows use the stdlib
+encoder.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'popi_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from accounts.renderers import FastJSONRenderer, orjson  # noqa: E402
+
+
+EDGE_CASES = {
+    'line_separators': 'a\u2028b\u2029c',
+    'unicode': 'ba\u00f1o \U0001f6bb "q" \\ \n\t\x01',
+    'integers': [0, -1, 2 ** 63 - 1, -2 ** 63, 2 ** 70],
+    'floats': [0.1, -0.0, 20.659734, 1e15, 0.0001, 123456789.123],
+    'decimal': Decimal('4.5'),
+    'datetimes': [
+        datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=-6))),
+        datetime(2024, 1, 1, 1, 2, 3),
+    ],
+    'non_str_keys': {1: 'a', 'b': None},
+    'nested': {'empty': {}, 'list': [], 'tuple': (True, False, None)},
+}
+
+
+def check_equivalent(stock, fast, data) -> list:
+    """Names of the cases where the renderers' bytes differ."""
+    cases = {'payload': data, **{name: {name: value} for name, value in EDGE_CASES.items()}}
+    return [name for name, value in cases.items() if stock.render(value) != fast.render(value)]
+
+
+def build_payload(count: int) -> dict:
+    rng = random.Random(42)
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    places = []
+    for i in range(count):
+        places.append({
+            'id': i + 1,
+            'business_name': f'Negocio {i}',
+            'address': f'Av. Chapultepec {i}, Guadalajara, Jal.',
+            'lat': float(Decimal('20.6597') + Decimal(rng.randint(-50000, 50000)) / 1000000),
+            'lng': float(Decimal('-103.3496') + Decimal(rng.randint(-50000, 50000)) / 1000000),
+            'rating': Decimal(rng.randint(10, 50)) / 10,
+            'review_count': rng.randint(0, 500),
+            'website': f'https://negocio{i}.example.com',
+            'business_phone': f'33{rng.randint(10000000, 99999999)}',
+            'place_id': f'ChIJ{rng.getrandbits(64):016x}',
+            'photo_url': '',
+            'created_at': now + timedelta(minutes=i, microseconds=rng.randint(0, 999999)),
+            'distance_km': round(rng.random() * 5, 3),
+        })
+    return {'places': places, 'version': 1}
+
+
+def measure(renderer, data, seconds: float) -> tuple:
+    renders = 0
+    size = 0
+    started = time.perf_counter()
+    while True:
+        size = len(renderer.render(data))
+        renders += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return renders / elapsed, renders * size / elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--places', type=int, default=5000)
+    parser.add_argument('--seconds', type=float, default=3.0, help='Time spent on each renderer.')
+    args = parser.parse_args()
+
+    data = build_payload(args.places)
+    stock = JSONRenderer()
+    fast = FastJSONRenderer()
+    mismatches = check_equivalent(stock, fast, data)
+    if mismatches:
+        sys.exit(f"Renderers produced different bytes for: {', '.join(mismatches)}")
+
+    print(f"{args.places} places, orjson {'available' if orjson else 'not installed'}")
+    print(f"{'renderer':<18} {'renders/s':>10} {'MB/s':>8} {'bytes':>10}")
+    baseline = None
+    for name, renderer in (('JSONRenderer', stock), ('FastJSONRenderer', fast)):
+        rate, throughput, size = measure(renderer, data, args.seconds)
+        baseline = baseline or throughput
+        print(f'{name:<18} {rate:>10.1f} {throughput / 1e6:>8.1f} {size:>10}  x{throughput / baseline:.2f}')
+
+
+if __name__ == '__main__':
+    main()
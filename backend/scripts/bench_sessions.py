@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Per-request session overhead for each SESSION_BACKEND mode.
+
+For db, cached_db and signed_cookies it measures:
+- read: SessionMiddleware restoring an authenticated session and the view
+  reading it (what every logged-in request pays), and its database queries;
+- write: creating and saving a new session (what a login pays).
+
+    python scripts/bench_sessions.py --requests 2000
+    CACHE_URL=rediscache://127.0.0.1:6379/1 python scripts/bench_sessions.py
+
+By default it runs against the configured database and cache (run migrate
+first). `--sqlite` uses a throwaway SQLite file instead. cached_db numbers
+with the default local-memory cache are a best case; point CACHE_URL at the
+shared cache used in production for realistic ones.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'popi_backend.settings')
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000, help='Iterations per mode and operation.')
+    parser.add_argument('--sqlite', action='store_true', help='Use a temporary SQLite database.')
+    parser.add_argument('--mode', action='append', choices=list(ENGINES), help='Modes to run (default: all).')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    import django
+    if args.sqlite:
+        import popi_backend.settings as project_settings
+        project_settings.DATABASES = {'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(tempfile.mkdtemp(), 'bench_sessions.sqlite3'),
+        }}
+    django.setup()
+
+    from importlib import import_module
+
+    from django.contrib.sessions.middleware import SessionMiddleware
+    from django.contrib.sessions.models import Session
+    from django.core.management import call_command
+    from django.db import connection
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    if args.sqlite:
+        call_command('migrate', 'sessions', verbosity=0)
+
+    factory = RequestFactory()
+    # What django.contrib.auth.login() stores
+    auth_data = {
+        '_auth_user_id': '1',
+        '_auth_user_backend': 'accounts.backends.ProfileModelBackend',
+        '_auth_user_hash': 'x' * 64,
+    }
+
+    def view(request):
+        request.session.get('_auth_user_id')
+        return HttpResponse()
+
+    created = []
+    print(f"{'mode':<16} {'read us/req':>12} {'queries/req':>12} {'write us/login':>15}")
+    for mode in args.mode or list(ENGINES):
+        with override_settings(SESSION_ENGINE=ENGINES[mode]):
+            from django.conf import settings
+            store_class = import_module(settings.SESSION_ENGINE).SessionStore
+            store = store_class()
+            store.update(auth_data)
+            store.save()
+            created.append(store.session_key)
+            cookie = f'{settings.SESSION_COOKIE_NAME}={store.session_key}'
+            middleware = SessionMiddleware(view)
+
+            middleware(factory.get('/', HTTP_COOKIE=cookie))  # warm the cache for cached_db
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for _ in range(args.requests):
+                    middleware(factory.get('/', HTTP_COOKIE=cookie))
+                read = (time.perf_counter() - started) / args.requests
+
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                new = store_class()
+                new.update(auth_data)
+                new.save()
+                created.append(new.session_key)
+            write = (time.perf_counter() - started) / args.requests
+
+            print(f'{mode:<16} {read * 1e6:>12.1f} {len(queries) / args.requests:>12.2f} {write * 1e6:>15.1f}')
+
+    # Signed-cookie keys never match a row, so this only removes the db/cached_db ones
+    for start in range(0, len(created), 500):
+        Session.objects.filter(session_key__in=created[start:start + 500]).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""Concurrent GET load test for the public endpoints.
+
+Compares the sync DRF views with their async-native variants (ASYNC_VIEWS).
+Start the same code twice under an ASGI server with the same worker count,
+then point the script at both:
+
+    ASYNC_VIEWS=False uvicorn popi_backend.asgi:application --workers 2 --port 8001
+    ASYNC_VIEWS=True  uvicorn popi_backend.asgi:application --workers 2 --port 8002
+    python scripts/load_test.py --url http://127.0.0.1:8001 --url http://127.0.0.1:8002 \\
+        --concurrency 200 --duration 20 --place-id 1
+
+Each of `--concurrency` clients keeps one keep-alive connection open and cycles
+through the paths. Pass `--cookie 'sessionid=...'` to include /api/auth/me/.
+Only the standard library is used so it runs anywhere Python does.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    '/api/auth/places/public/',
+    '/api/auth/places/public/?lat=20.6597&lng=-103.3496&radius_km=5',
+    '/api/auth/places/public/?lat=20.6597&lng=-103.3496&mode=nearest&limit=20',
+]
+
+
+class Connection:
+    def __init__(self, host: str, port: int, headers: dict):
+        self.host = host
+        self.port = port
+        self.headers = ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+        self.reader = None
+        self.writer = None
+
+    async def get(self, path: str) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        request = f'GET {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n{self.headers}\r\n'
+        self.writer.write(request.encode('latin-1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed')
+        status = int(status_line.split()[1])
+        length = None
+        chunked = False
+        keep_alive = True
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding' and 'chunked' in value.lower():
+                chunked = True
+            elif name == 'connection' and value.lower() == 'close':
+                keep_alive = False
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length is not None:
+            await self.reader.readexactly(length)
+        else:
+            await self.reader.read()
+            keep_alive = False
+        if not keep_alive:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def client(base, paths: list, headers: dict, deadline: float, results: dict, offset: int):
+    conn = Connection(base.hostname, base.port or 80, headers)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                status = await conn.get(path)
+            except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+                conn.close()
+                results[path]['errors'] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            bucket = results[path]
+            bucket['latencies'].append(elapsed)
+            bucket['statuses'][status] = bucket['statuses'].get(status, 0) + 1
+    finally:
+        conn.close()
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(url: str, paths: list, headers: dict, concurrency: int, duration: float) -> dict:
+    base = urlsplit(url)
+    results = {path: {'latencies': [], 'errors': 0, 'statuses': {}} for path in paths}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        client(base, paths, headers, deadline, results, offset)
+        for offset in range(concurrency)
+    ])
+    return results
+
+
+def report(url: str, results: dict, duration: float):
+    print(f'\n{url}')
+    print(f"{'path':<75} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}  statuses")
+    total = 0
+    for path, bucket in results.items():
+        latencies = bucket['latencies']
+        total += len(latencies)
+        print(
+            f'{path[:75]:<75} {len(latencies) / duration:>8.1f} '
+            f'{percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} '
+            f'{percentile(latencies, 0.99) * 1000:>8.1f} {bucket["errors"]:>7}  {bucket["statuses"]}'
+        )
+    everything = [value for bucket in results.values() for value in bucket['latencies']]
+    mean = statistics.mean(everything) * 1000 if everything else 0.0
+    print(f'total: {total / duration:.1f} req/s, mean latency {mean:.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', action='append', required=True, help='Server base URL; repeat to compare servers.')
+    parser.add_argument('--path', action='append', help='GET path to request (repeatable). Defaults to the public place lists.')
+    parser.add_argument('--place-id', type=int, help='Also request /api/auth/places/public/<id>/.')
+    parser.add_argument('--cookie', help='Cookie header, e.g. sessionid=...; adds /api/auth/me/.')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per server.')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Seconds of unmeasured load first.')
+    args = parser.parse_args()
+
+    paths = list(args.path or DEFAULT_PATHS)
+    if args.place_id:
+        paths.append(f'/api/auth/places/public/{args.place_id}/')
+    headers = {'Accept': 'application/json'}
+    if args.cookie:
+        headers['Cookie'] = args.cookie
+        paths.append('/api/auth/me/')
+
+    for url in args.url:
+        if args.warmup > 0:
+            asyncio.run(run(url, paths, headers, args.concurrency, args.warmup))
+        results = asyncio.run(run(url, paths, headers, args.concurrency, args.duration))
+        report(url, results, args.duration)
+
+
+if __name__ == '__main__':
+    main()
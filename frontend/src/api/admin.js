@@ -20,4 +20,28 @@ export async function decideCollaborator(applicationId, action) {
     });
     throw error;
   }
-}
\ No newline at end of file
+}
+
+function buildQuery(params = {}) {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value != null && value !== '') query.set(key, String(value));
+  });
+  const qs = query.toString();
+  return qs ? `?${qs}` : '';
+}
+
+export function listAdminCollaborators(params = {}) {
+  return request("/api/auth/admin/collaborators/" + buildQuery(params), { method: "GET" });
+}
+
+export function listAdminUsers(params = {}) {
+  return request("/api/auth/admin/users/" + buildQuery(params), { method: "GET" });
+}
+
+export function decideCollaboratorsBulk(ids, action) {
+  return request("/api/auth/admin/collaborators/decision/", {
+    method: "POST",
+    body: { action, ids },
+  });
+}
@@ -17,3 +17,10 @@ export function applyCollaboratorBusiness(formData) {
     body: formData,
   });
 }
+
+export function issueAccessCodeBatch(applicationId, { count, ttlMinutes } = {}) {
+  return request(`/api/auth/partner/applications/${applicationId}/codes/batch/`, {
+    method: 'POST',
+    body: { count, ttl_minutes: ttlMinutes, format: 'json' },
+  });
+}
@@ -5,13 +5,39 @@ export function fetchPublicPlaces(params = {}) {
   if (params.lat != null) query.set('lat', String(params.lat));
   if (params.lng != null) query.set('lng', String(params.lng));
   if (params.radius_km != null) query.set('radius_km', String(params.radius_km));
+  if (params.fields) query.set('fields', [].concat(params.fields).join(','));
+  if (params.format) query.set('format', params.format);
   const qs = query.toString();
   const path = `/api/auth/places/public/${qs ? `?${qs}` : ''}`;
   return request(path, { method: 'GET' });
 }
 
+// Map markers only need id/lat/lng: fetch them as columns and rebuild the objects
+export async function fetchPlaceMarkers(params = {}) {
+  const data = await fetchPublicPlaces({ ...params, fields: ['id', 'lat', 'lng'], format: 'columnar' });
+  const { id = [], lat = [], lng = [] } = data.columns || {};
+  return {
+    places: id.map((placeId, i) => ({ id: placeId, lat: lat[i], lng: lng[i] })),
+    version: data.version,
+  };
+}
+
 export function fetchPublicPlaceById(id) {
   if (typeof id === 'undefined' || id === null) return Promise.reject(new Error('Missing id'));
   const path = `/api/auth/places/public/${encodeURIComponent(String(id))}/`;
   return request(path, { method: 'GET' });
 }
+
+export function fetchNearestPlaces(params = {}) {
+  const query = new URLSearchParams({ mode: 'nearest' });
+  query.set('lat', String(params.lat));
+  query.set('lng', String(params.lng));
+  if (params.limit != null) query.set('limit', String(params.limit));
+  if (params.cursor) query.set('cursor', params.cursor);
+  return request(`/api/auth/places/public/?${query.toString()}`, { method: 'GET' });
+}
+
+export function fetchPlaceClusters({ bbox, zoom }) {
+  const query = new URLSearchParams({ bbox: bbox.join(','), zoom: String(zoom) });
+  return request(`/api/auth/places/public/clusters/?${query.toString()}`, { method: 'GET' });
+}